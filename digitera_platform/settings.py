@@ -267,6 +267,20 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'flush-product-view-counts': {
+        'task': 'digitera_platform.tasks.flush_view_counts',
+        'schedule': 60.0,
+    },
+    'refresh-popular-products': {
+        'task': 'digitera_platform.tasks.refresh_popular_products',
+        'schedule': 600.0,
+    },
+    'build-product-tfidf-index': {
+        'task': 'digitera_platform.tasks.build_product_tfidf_index',
+        'schedule': 3600.0,
+    },
+}
 
 # South African Market Settings
 DEFAULT_CURRENCY = config('DEFAULT_CURRENCY', default='ZAR')
@@ -348,6 +362,12 @@ if config('USE_S3', default=False, cast=bool):
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
     STATICFILES_STORAGE = 'storages.backends.s3boto3.S3StaticStorage'
 
+# Sample Data Configuration
+SAMPLE_DATA_BATCH_SIZE = config('DIGITERA_SAMPLE_BATCH_SIZE', default=500, cast=int)
+
+# Recommendation Configuration
+RECOMMENDATION_INDEX_PATH = config('RECOMMENDATION_INDEX_PATH', default=str(BASE_DIR / 'recommendation_index.joblib'))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
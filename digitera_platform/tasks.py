@@ -190,26 +190,16 @@ def update_product_analytics(product_id, analytics_data):
         product = Product.objects.get(id=product_id)
         today = timezone.now().date()
         
-        analytics, created = ProductAnalytics.objects.get_or_create(
-            product=product,
-            date=today,
-            defaults={
-                'views': 0,
-                'unique_views': 0,
-                'sales_count': 0,
-                'revenue': Decimal('0.00'),
-                'conversion_rate': 0.0,
-                'bounce_rate': 0.0,
-                'avg_session_duration': 0.0
-            }
-        )
-        
-        # Update analytics with new data
-        for key, value in analytics_data.items():
-            if hasattr(analytics, key):
-                setattr(analytics, key, value)
-        
-        analytics.save()
+        # Upsert today's row, overwriting only the metrics that were sent
+        metrics = {
+            key: value for key, value in analytics_data.items()
+            if key in ProductAnalytics.METRIC_FIELDS
+        }
+        if metrics:
+            ProductAnalytics.bulk_upsert(
+                [ProductAnalytics(product=product, date=today, **metrics)],
+                update_fields=list(metrics)
+            )
         
         logger.info(f"Analytics updated for product {product_id}")
         
@@ -315,6 +305,48 @@ def generate_ai_product_recommendations(user_id):
         logger.error(f"Failed to generate recommendations for user {user_id}: {str(exc)}")
 
 
+@shared_task
+def build_product_tfidf_index():
+    """Refit the TF-IDF index used for ML product recommendations."""
+    try:
+        from products.marketplace_views import build_tfidf_index
+        
+        version = build_tfidf_index()
+        
+        logger.info(f"Product TF-IDF index rebuilt (version {version})")
+        
+    except Exception as exc:
+        logger.error(f"Failed to rebuild product TF-IDF index: {str(exc)}")
+
+
+@shared_task
+def flush_view_counts():
+    """Write buffered product view counts to the database."""
+    try:
+        from products.interactions import flush_view_counts as flush_buffered_views
+        
+        flushed = flush_buffered_views()
+        
+        logger.info(f"Flushed view counts for {flushed} products")
+        
+    except Exception as exc:
+        logger.error(f"Failed to flush product view counts: {str(exc)}")
+
+
+@shared_task
+def refresh_popular_products():
+    """Recompute the cached popular products used by marketplace discovery."""
+    try:
+        from products.marketplace_views import refresh_popular_products as refresh_ranking
+        
+        product_ids = refresh_ranking()
+        
+        logger.info(f"Popular products refreshed ({len(product_ids)} ranked)")
+        
+    except Exception as exc:
+        logger.error(f"Failed to refresh popular products: {str(exc)}")
+
+
 @shared_task
 def generate_ai_product_tags(product_id):
     """Generate AI tags for a product based on its content."""
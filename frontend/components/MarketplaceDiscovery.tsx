@@ -70,15 +70,15 @@ const API_BASE = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
 const api = {
   async getMarketplaceData(params: {
-    page?: number;
+    cursor?: string;
     category?: string;
     search?: string;
     sort_by?: string;
     filter?: string;
   }) {
     const query = new URLSearchParams({
-      page: params.page?.toString() || '1',
       page_size: '20',
+      ...(params.cursor && { cursor: params.cursor }),
       ...(params.category && { category: params.category }),
       ...(params.search && { search: params.search }),
       ...(params.sort_by && { sort_by: params.sort_by }),
@@ -415,7 +415,7 @@ const MarketplaceDiscovery: React.FC<{
 
   const [loading, setLoading] = useState(false);
   const [hasMore, setHasMore] = useState(true);
-  const [page, setPage] = useState(1);
+  const [cursor, setCursor] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
   const [selectedCategory, setSelectedCategory] = useState('all');
   const [sortBy, setSortBy] = useState('trending');
@@ -430,9 +430,9 @@ const MarketplaceDiscovery: React.FC<{
 
     setLoading(true);
     try {
-      const currentPage = reset ? 1 : page;
+      const currentCursor = reset ? null : cursor;
       const data = await api.getMarketplaceData({
-        page: currentPage,
+        cursor: currentCursor || undefined,
         category: selectedCategory !== 'all' ? selectedCategory : undefined,
         search: searchQuery || undefined,
         sort_by: sortBy,
@@ -441,11 +441,10 @@ const MarketplaceDiscovery: React.FC<{
 
       if (reset) {
         setProducts(data.results);
-        setPage(2);
       } else {
         setProducts(prev => [...prev, ...data.results]);
-        setPage(prev => prev + 1);
       }
+      setCursor(data.next_cursor);
 
       setHasMore(data.has_next);
     } catch (error) {
@@ -453,7 +452,7 @@ const MarketplaceDiscovery: React.FC<{
     } finally {
       setLoading(false);
     }
-  }, [loading, hasMore, page, selectedCategory, searchQuery, sortBy, filterType]);
+  }, [loading, hasMore, cursor, selectedCategory, searchQuery, sortBy, filterType]);
 
   // Load initial products
   useEffect(() => {
@@ -290,7 +290,9 @@ class OrderItem(models.Model):
         verbose_name_plural = _('Order Items')
         indexes = [
             models.Index(fields=['order']),
-            models.Index(fields=['product']),
+            # Also serves product-only lookups; covers the seller
+            # (items__product__creator) permission joins
+            models.Index(fields=['product', 'order']),
             models.Index(fields=['is_fulfilled']),
         ]
     
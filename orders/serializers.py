@@ -317,7 +317,9 @@ class OrderListSerializer(serializers.ModelSerializer):
         return obj.get_customer_email()
     
     def get_item_count(self, obj):
-        # This should be optimized with annotations
+        # Use the item_count annotation when the view provides one
+        if hasattr(obj, 'item_count'):
+            return obj.item_count
         return obj.items.count()
 
 
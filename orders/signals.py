@@ -0,0 +1,21 @@
+"""
+Signal handlers for the orders app.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+User = get_user_model()
+
+STAFF_USER_IDS_CACHE_KEY = 'orders:staff_user_ids'
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_staff_user_ids(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached staff ID set when a user's staff flag may have changed."""
+    if update_fields is not None and 'is_staff' not in update_fields:
+        return
+    cache.delete(STAFF_USER_IDS_CACHE_KEY)
@@ -1,3 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from products.models import DigitalDownload, Product
+
+from .models import Order, OrderItem, OrderStatusHistory
+from .views import OrderViewSet
+
+User = get_user_model()
+
+
+class UpdateStatusBulkTests(TestCase):
+    """The bulk order status endpoint."""
+    
+    url = '/orders/api/update_status_bulk/'
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(email='creator@example.com', password='password')
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='password')
+        cls.product = Product.objects.create(creator=cls.creator, name='Template', price=10)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+    
+    def create_order(self, items=1):
+        order = Order.objects.create(buyer=self.buyer, subtotal=10)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.product, product_name=self.product.name)
+            for _ in range(items)
+        ])
+        return order
+    
+    def post(self, orders, status='processing'):
+        return self.client.post(self.url, {'updates': [
+            {'order_id': str(order.pk), 'status': status, 'reason': 'Batch'} for order in orders
+        ]}, format='json')
+    
+    def test_updates_every_order(self):
+        orders = [self.create_order(items=index + 1) for index in range(3)]
+        
+        response = self.post(orders)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row['id']: row['item_count'] for row in response.json()},
+            {str(order.pk): index + 1 for index, order in enumerate(orders)}
+        )
+        self.assertEqual(Order.objects.filter(status='processing').count(), 3)
+        self.assertEqual(OrderStatusHistory.objects.filter(reason='Batch').count(), 3)
+    
+    def test_query_count_does_not_grow_with_orders(self):
+        query_counts = []
+        for count in (2, 6):
+            orders = [self.create_order(items=2) for _ in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post(orders).status_code, 200)
+            query_counts.append(len(queries))
+        
+        self.assertEqual(query_counts[0], query_counts[1])
+    
+    def test_other_users_orders_are_forbidden(self):
+        order = self.create_order()
+        self.client.force_authenticate(self.buyer)
+        
+        response = self.post([order])
+        
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(OrderStatusHistory.objects.exists())
+    
+    def test_invalid_updates_are_rejected(self):
+        order = self.create_order()
+        
+        self.assertEqual(self.post([order], status='shipped').status_code, 400)
+        response = self.client.post(self.url, {'updates': [
+            {'order_id': 'not-a-uuid', 'status': 'processing'}
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class FulfillOrderTests(TestCase):
+    """Fulfilling the items of a paid order."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(email='creator@example.com', password='password')
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='password')
+        cls.product = Product.objects.create(creator=cls.creator, name='Coaching', price=10)
+        cls.download = DigitalDownload.objects.create(
+            creator=cls.creator, name='Font Pack', slug='font-pack', price=5,
+            download_files=['https://example.com/files/regular.otf', 'https://example.com/files/bold.otf'],
+            license_type='Commercial License'
+        )
+    
+    def fulfill(self, *products):
+        order = Order.objects.create(buyer=self.buyer, subtotal=15)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, product_name=product.name) for product in products
+        ])
+        OrderViewSet().fulfill_order(order)
+        return {item.product_id: item for item in order.items.all()}
+    
+    def test_download_gets_links_and_license_key(self):
+        item = self.fulfill(self.download)[self.download.pk]
+        
+        self.assertTrue(item.is_fulfilled)
+        self.assertTrue(item.license_key.startswith('DIG-'))
+        self.assertEqual([link['filename'] for link in item.download_links], ['regular.otf', 'bold.otf'])
+    
+    def test_unlicensed_download_gets_no_license_key(self):
+        DigitalDownload.objects.filter(pk=self.download.pk).update(license_type='')
+        
+        item = self.fulfill(self.download)[self.download.pk]
+        
+        self.assertTrue(item.is_fulfilled)
+        self.assertEqual(item.license_key, '')
+    
+    def test_other_products_are_granted_access(self):
+        items = self.fulfill(self.product, self.download)
+        
+        item = items[self.product.pk]
+        self.assertTrue(item.access_granted and item.is_fulfilled)
+        self.assertEqual((item.license_key, item.download_links), ('', []))
+        self.assertTrue(items[self.download.pk].license_key)
+    
+    def test_query_count_does_not_grow_with_items(self):
+        order = Order.objects.create(buyer=self.buyer, subtotal=15)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.download, product_name=self.download.name) for _ in range(3)
+        ])
+        
+        # One SELECT for the items, then one UPDATE per item
+        with self.assertNumQueries(4):
+            OrderViewSet().fulfill_order(order)
@@ -8,10 +8,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Sum, Count, Avg
+from django.db.models import Q, Sum, Count, Avg, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from decimal import Decimal
+from functools import lru_cache
+import uuid
 from django.views.generic import ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render
@@ -26,6 +31,36 @@ from .serializers import (
     OrderItemSerializer, SubscriptionSerializer, DisputeSerializer,
     InvoiceSerializer, RefundRequestSerializer, OrderStatusHistorySerializer
 )
+from .signals import STAFF_USER_IDS_CACHE_KEY
+
+User = get_user_model()
+
+STAFF_USER_IDS_CACHE_TIMEOUT = 60
+
+
+@lru_cache(maxsize=32)
+def _error_payload(message):
+    """Shared, read-only error body for a given message."""
+    return {'error': message}
+
+
+def _error_response(message, code):
+    """
+    Build an error response around a cached payload.
+
+    DRF mutates Response objects while rendering them, so only the body is
+    reused between requests; the Response itself is created per call.
+    """
+    return Response(_error_payload(message), status=code)
+
+
+def _staff_user_ids():
+    """Return the set of staff user IDs, cached briefly across requests."""
+    staff_ids = cache.get(STAFF_USER_IDS_CACHE_KEY)
+    if staff_ids is None:
+        staff_ids = set(User.objects.filter(is_staff=True).values_list('id', flat=True))
+        cache.set(STAFF_USER_IDS_CACHE_KEY, staff_ids, STAFF_USER_IDS_CACHE_TIMEOUT)
+    return staff_ids
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -38,6 +73,10 @@ class OrderViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'total_amount', 'status']
     ordering = ['-created_at']
     
+    # Status sets checked on the mutation paths
+    _VALID_STATUSES = frozenset(Order.OrderStatus.values)
+    _REFUND_ELIGIBLE_STATUSES = frozenset({Order.OrderStatus.COMPLETED})
+    
     def get_queryset(self):
         """Filter orders based on user permissions."""
         queryset = super().get_queryset()
@@ -45,6 +84,13 @@ class OrderViewSet(viewsets.ModelViewSet):
         # Add related data for performance
         queryset = queryset.select_related('buyer').prefetch_related(
             'items__product', 'status_history', 'disputes', 'refund_requests'
+        ).annotate(
+            has_pending_refund=Exists(
+                RefundRequest.objects.filter(
+                    order_id=OuterRef('pk'),
+                    status=RefundRequest.RefundStatus.PENDING
+                )
+            )
         )
         
         # Filter based on user permissions
@@ -113,32 +159,93 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Check permissions
         if not self.can_update_order(request.user, order):
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
         new_status = request.data.get('status')
         reason = request.data.get('reason', '')
         
         if not new_status:
-            return Response(
-                {'error': 'Status is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _error_response('Status is required', status.HTTP_400_BAD_REQUEST)
+        
+        if new_status not in self._VALID_STATUSES:
+            return _error_response('Invalid status', status.HTTP_400_BAD_REQUEST)
+        
+        history = self.apply_status_change(order, new_status, request.user, reason)
+        history.save()
+        order.save(update_fields=['status', 'completed_at', 'updated_at'])
         
-        if new_status not in dict(Order.OrderStatus.choices):
-            return Response(
-                {'error': 'Invalid status'},
-                status=status.HTTP_400_BAD_REQUEST
+        # Trigger fulfillment if order is completed
+        if new_status == Order.OrderStatus.COMPLETED:
+            self.fulfill_order(order)
+        
+        serializer = self.get_serializer(order)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def update_status_bulk(self, request):
+        """Update the status of several orders in one round-trip per table."""
+        updates = request.data.get('updates')
+        
+        if not updates or not isinstance(updates, list):
+            return _error_response('Updates are required', status.HTTP_400_BAD_REQUEST)
+        
+        parsed = []
+        for update in updates:
+            if not isinstance(update, dict) or update.get('status') not in self._VALID_STATUSES:
+                return _error_response('Invalid status', status.HTTP_400_BAD_REQUEST)
+            try:
+                order_id = uuid.UUID(str(update.get('order_id')))
+            except ValueError:
+                return _error_response('Invalid order', status.HTTP_400_BAD_REQUEST)
+            parsed.append((order_id, update['status'], update.get('reason', '')))
+        
+        # Resolve every order up front; non-staff may only touch orders
+        # containing their own products
+        order_ids = {order_id for order_id, _, _ in parsed}
+        # Load what OrderListSerializer reads up front instead of per order
+        item_counts = OrderItem.objects.filter(
+            order=OuterRef('pk')
+        ).order_by().values('order').annotate(total=Count('id')).values('total')
+        orders = Order.objects.filter(pk__in=order_ids).select_related('buyer').annotate(
+            item_count=Coalesce(Subquery(item_counts), 0)
+        )
+        if not request.user.is_staff:
+            orders = orders.filter(items__product__creator=request.user).distinct()
+        orders_by_id = orders.in_bulk()
+        
+        if len(orders_by_id) != len(order_ids):
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
+        
+        history = [
+            self.apply_status_change(orders_by_id[order_id], new_status, request.user, reason)
+            for order_id, new_status, reason in parsed
+        ]
+        
+        changed_orders = list(orders_by_id.values())
+        now = timezone.now()
+        for order in changed_orders:
+            order.updated_at = now
+        
+        with transaction.atomic():
+            OrderStatusHistory.objects.bulk_create(history, batch_size=500)
+            Order.objects.bulk_update(
+                changed_orders, ['status', 'completed_at', 'updated_at'], batch_size=500
             )
         
-        # Create status history record
-        OrderStatusHistory.objects.create(
+        for order in changed_orders:
+            if order.status == Order.OrderStatus.COMPLETED:
+                self.fulfill_order(order)
+        
+        serializer = OrderListSerializer(changed_orders, many=True, context={'request': request})
+        return Response(serializer.data)
+    
+    def apply_status_change(self, order, new_status, user, reason=''):
+        """Set the new status on the order and return an unsaved history record."""
+        history = OrderStatusHistory(
             order=order,
             previous_status=order.status,
             new_status=new_status,
-            changed_by=request.user,
+            changed_by=user,
             reason=reason
         )
         
@@ -152,14 +259,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             # Handle cancellation logic
             pass
         
-        order.save()
-        
-        # Trigger fulfillment if order is completed
-        if new_status == Order.OrderStatus.COMPLETED:
-            self.fulfill_order(order)
-        
-        serializer = self.get_serializer(order)
-        return Response(serializer.data)
+        return history
     
     def can_update_order(self, user, order):
         """Check if user can update order status."""
@@ -171,39 +271,46 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     def fulfill_order(self, order):
         """Fulfill order items after successful payment."""
-        for item in order.items.all():
-            if not item.is_fulfilled:
-                # Generate digital download links or grant access
-                if hasattr(item.product, 'digitaldownload'):
-                    item.download_links = self.generate_download_links(item)
+        # Load each product with its DigitalDownload row up front so the
+        # per-item checks below don't query
+        items = order.items.filter(is_fulfilled=False).select_related('product__digitaldownload')
+        for item in items:
+            # Generate digital download links or grant access
+            download = getattr(item.product, 'digitaldownload', None)
+            if download is not None:
+                item.download_links = self.generate_download_links(item, download.download_files)
                 
-                # Generate license keys for software
-                if getattr(item.product, 'license_type', None):
+                # Generate license keys for software; license_type lives on
+                # the joined subclass row, not the base Product
+                if download.license_type:
                     item.license_key = self.generate_license_key(item)
-                
-                # Grant access
-                item.access_granted = True
-                item.is_fulfilled = True
-                item.fulfilled_at = timezone.now()
-                item.save()
-    
-    def generate_download_links(self, order_item):
-        """Generate secure download links for digital products."""
+            
+            # Grant access
+            item.access_granted = True
+            item.is_fulfilled = True
+            item.fulfilled_at = timezone.now()
+            item.save(update_fields=[
+                'download_links', 'license_key', 'access_granted',
+                'is_fulfilled', 'fulfilled_at'
+            ])
+    
+    def generate_download_links(self, order_item, download_files):
+        """Generate secure download links for a product's download files."""
         # This would integrate with your file storage system
+        expires_at = (timezone.now() + timezone.timedelta(days=30)).isoformat()
         links = []
-        for file in order_item.product.files.all():
-            signed_url = f"/api/downloads/secure/{file.id}/?order={order_item.order.id}&token=secure_token"
+        for file_id, file_url in enumerate(download_files, start=1):
+            signed_url = f"/api/downloads/secure/{file_id}/?order={order_item.order_id}&token=secure_token"
             links.append({
-                'file_id': file.id,
-                'filename': file.name,
+                'file_id': file_id,
+                'filename': file_url.rsplit('/', 1)[-1],
                 'url': signed_url,
-                'expires_at': timezone.now() + timezone.timedelta(days=30)
+                'expires_at': expires_at
             })
         return links
     
     def generate_license_key(self, order_item):
         """Generate license key for software products."""
-        import uuid
         return f"DIG-{uuid.uuid4().hex[:8].upper()}-{order_item.product.id}"
     
     @action(detail=True, methods=['get'])
@@ -213,10 +320,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Check permissions
         if not self.can_view_order(request.user, order):
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
         # Get or create invoice
         invoice, created = Invoice.objects.get_or_create(
@@ -260,33 +364,21 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Check permissions - only buyer can request refund
         if order.buyer != request.user:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
         # Check if order is eligible for refund
-        if order.status not in [Order.OrderStatus.COMPLETED]:
-            return Response(
-                {'error': 'Order is not eligible for refund'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if order.status not in self._REFUND_ELIGIBLE_STATUSES:
+            return _error_response('Order is not eligible for refund', status.HTTP_400_BAD_REQUEST)
         
         # Check if refund already requested
-        if order.refund_requests.filter(status='pending').exists():
-            return Response(
-                {'error': 'Refund already requested'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if order.has_pending_refund:
+            return _error_response('Refund already requested', status.HTTP_400_BAD_REQUEST)
         
         amount = request.data.get('amount', order.total_amount)
         reason = request.data.get('reason', '')
         
         if not reason:
-            return Response(
-                {'error': 'Refund reason is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _error_response('Refund reason is required', status.HTTP_400_BAD_REQUEST)
         
         # Create refund request
         refund_request = RefundRequest.objects.create(
@@ -344,6 +436,10 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'next_billing_date', 'status']
     ordering = ['-created_at']
     
+    # Status sets checked on the mutation paths
+    _CAN_PAUSE_FROM = frozenset({Subscription.SubscriptionStatus.ACTIVE})
+    _CAN_RESUME_FROM = frozenset({Subscription.SubscriptionStatus.PAUSED})
+    
     def get_queryset(self):
         """Filter subscriptions based on user permissions."""
         queryset = super().get_queryset()
@@ -380,15 +476,12 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         
         # Check permissions
         if subscription.user != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
         # Cancel subscription
         subscription.status = Subscription.SubscriptionStatus.CANCELLED
         subscription.cancelled_at = timezone.now()
-        subscription.save()
+        subscription.save(update_fields=['status', 'cancelled_at', 'updated_at'])
         
         serializer = self.get_serializer(subscription)
         return Response(serializer.data)
@@ -400,19 +493,13 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         
         # Check permissions
         if subscription.user != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
-        if subscription.status != Subscription.SubscriptionStatus.ACTIVE:
-            return Response(
-                {'error': 'Can only pause active subscriptions'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if subscription.status not in self._CAN_PAUSE_FROM:
+            return _error_response('Can only pause active subscriptions', status.HTTP_400_BAD_REQUEST)
         
         subscription.status = Subscription.SubscriptionStatus.PAUSED
-        subscription.save()
+        subscription.save(update_fields=['status', 'updated_at'])
         
         serializer = self.get_serializer(subscription)
         return Response(serializer.data)
@@ -424,19 +511,13 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         
         # Check permissions
         if subscription.user != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
-        if subscription.status != Subscription.SubscriptionStatus.PAUSED:
-            return Response(
-                {'error': 'Can only resume paused subscriptions'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if subscription.status not in self._CAN_RESUME_FROM:
+            return _error_response('Can only resume paused subscriptions', status.HTTP_400_BAD_REQUEST)
         
         subscription.status = Subscription.SubscriptionStatus.ACTIVE
-        subscription.save()
+        subscription.save(update_fields=['status', 'updated_at'])
         
         serializer = self.get_serializer(subscription)
         return Response(serializer.data)
@@ -455,8 +536,14 @@ class DisputeViewSet(viewsets.ModelViewSet):
         """Filter disputes based on user permissions."""
         queryset = super().get_queryset()
         
-        # Add related data
-        queryset = queryset.select_related('order__buyer', 'assigned_to')
+        # Add related data, limited to the columns DisputeSerializer reads
+        queryset = queryset.select_related('order__buyer', 'assigned_to').only(
+            'id', 'order', 'dispute_id', 'dispute_type', 'status', 'reason',
+            'customer_message', 'resolution', 'refund_amount', 'assigned_to',
+            'updated_at', 'resolved_at',
+            'order__order_number', 'order__guest_email', 'order__buyer__email',
+            'assigned_to__first_name', 'assigned_to__last_name'
+        )
         
         # Filter based on user permissions
         if not self.request.user.is_staff:
@@ -475,19 +562,13 @@ class DisputeViewSet(viewsets.ModelViewSet):
         
         # Check permissions - only staff or assigned user can resolve
         if not request.user.is_staff and dispute.assigned_to != request.user:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
         resolution = request.data.get('resolution', '')
         refund_amount = request.data.get('refund_amount')
         
         if not resolution:
-            return Response(
-                {'error': 'Resolution is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _error_response('Resolution is required', status.HTTP_400_BAD_REQUEST)
         
         dispute.status = Dispute.DisputeStatus.RESOLVED
         dispute.resolution = resolution
@@ -496,7 +577,9 @@ class DisputeViewSet(viewsets.ModelViewSet):
         if refund_amount:
             dispute.refund_amount = Decimal(str(refund_amount))
         
-        dispute.save()
+        dispute.save(update_fields=[
+            'status', 'resolution', 'resolved_at', 'refund_amount', 'updated_at'
+        ])
         
         serializer = self.get_serializer(dispute)
         return Response(serializer.data)
@@ -508,27 +591,23 @@ class DisputeViewSet(viewsets.ModelViewSet):
         
         # Only staff can assign disputes
         if not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
         assigned_to_id = request.data.get('assigned_to')
         if assigned_to_id:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
             try:
-                assigned_user = User.objects.get(id=assigned_to_id, is_staff=True)
-                dispute.assigned_to = assigned_user
-                dispute.save()
-            except User.DoesNotExist:
-                return Response(
-                    {'error': 'Invalid user'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                assigned_to_id = uuid.UUID(str(assigned_to_id))
+            except ValueError:
+                return _error_response('Invalid user', status.HTTP_400_BAD_REQUEST)
+            
+            if assigned_to_id not in _staff_user_ids():
+                return _error_response('Invalid user', status.HTTP_400_BAD_REQUEST)
+            
+            dispute.assigned_to_id = assigned_to_id
         else:
             dispute.assigned_to = request.user
-            dispute.save()
+        
+        dispute.save(update_fields=['assigned_to', 'updated_at'])
         
         serializer = self.get_serializer(dispute)
         return Response(serializer.data)
@@ -543,12 +622,20 @@ class RefundRequestViewSet(viewsets.ModelViewSet):
     ordering_fields = ['requested_at', 'status', 'amount']
     ordering = ['-requested_at']
     
+    # Status sets checked on the mutation paths
+    _PROCESSABLE_STATUSES = frozenset({RefundRequest.RefundStatus.PENDING})
+    
     def get_queryset(self):
         """Filter refund requests based on user permissions."""
         queryset = super().get_queryset()
         
-        # Add related data
-        queryset = queryset.select_related('order__buyer', 'processed_by')
+        # Add related data, limited to the columns RefundRequestSerializer reads
+        queryset = queryset.select_related('order__buyer', 'processed_by').only(
+            'id', 'order', 'amount', 'reason', 'status', 'processed_by',
+            'processor_reference', 'requested_at', 'processed_at',
+            'order__order_number', 'order__guest_email', 'order__buyer__email',
+            'processed_by__first_name', 'processed_by__last_name'
+        )
         
         # Filter based on user permissions
         if not self.request.user.is_staff:
@@ -567,21 +654,15 @@ class RefundRequestViewSet(viewsets.ModelViewSet):
         
         # Only staff can approve refunds
         if not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
-        if refund_request.status != RefundRequest.RefundStatus.PENDING:
-            return Response(
-                {'error': 'Can only approve pending refund requests'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if refund_request.status not in self._PROCESSABLE_STATUSES:
+            return _error_response('Can only approve pending refund requests', status.HTTP_400_BAD_REQUEST)
         
         refund_request.status = RefundRequest.RefundStatus.APPROVED
         refund_request.processed_by = request.user
         refund_request.processed_at = timezone.now()
-        refund_request.save()
+        refund_request.save(update_fields=['status', 'processed_by', 'processed_at'])
         
         # Process the actual refund (integrate with payment processor)
         # This would call the payment gateway's refund API
@@ -596,21 +677,15 @@ class RefundRequestViewSet(viewsets.ModelViewSet):
         
         # Only staff can reject refunds
         if not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return _error_response('Permission denied', status.HTTP_403_FORBIDDEN)
         
-        if refund_request.status != RefundRequest.RefundStatus.PENDING:
-            return Response(
-                {'error': 'Can only reject pending refund requests'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if refund_request.status not in self._PROCESSABLE_STATUSES:
+            return _error_response('Can only reject pending refund requests', status.HTTP_400_BAD_REQUEST)
         
         refund_request.status = RefundRequest.RefundStatus.REJECTED
         refund_request.processed_by = request.user
         refund_request.processed_at = timezone.now()
-        refund_request.save()
+        refund_request.save(update_fields=['status', 'processed_by', 'processed_at'])
         
         serializer = self.get_serializer(refund_request)
         return Response(serializer.data)
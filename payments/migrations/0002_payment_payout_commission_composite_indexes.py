@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_orderitem_product_order_idx'),
+        ('payments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='affiliatecommission',
+            name='affiliate_c_affilia_63b526_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_order_i_b32b33_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payout',
+            name='payouts_user_id_ed1681_idx',
+        ),
+        migrations.AddIndex(
+            model_name='affiliatecommission',
+            index=models.Index(fields=['affiliate', 'paid_at'], name='affiliate_c_affilia_083225_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['order', 'status'], name='payments_order_i_3d4604_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='payouts_user_id_8e79c1_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_orderitem_product_order_idx'),
+        ('payments', '0002_payment_payout_commission_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='affiliatecommission',
+            index=models.Index(condition=models.Q(('paid_at__isnull', True)), fields=['affiliate'], name='unpaid_commissions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['user', 'created_at'], name='payout_pending_idx'),
+        ),
+    ]
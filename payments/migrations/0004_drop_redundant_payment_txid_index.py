@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_pending_payout_unpaid_commission_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_transac_a1f824_idx',
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:12
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Cast, Left, Mod, Right, StrIndex
+
+
+# The shard rule is copied here so later model changes can't alter this migration
+def hex_value(digit):
+    return StrIndex(Value('0123456789abcdef'), digit) - 1
+
+
+user_hex = Cast('user', models.CharField(max_length=36))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_drop_redundant_payment_txid_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='shard_key',
+            field=models.GeneratedField(
+                db_index=True,
+                db_persist=True,
+                expression=Mod(hex_value(Left(Right(user_hex, 2), 1)) * 16 + hex_value(Right(user_hex, 1)), 32),
+                help_text='Payout worker shard, derived from the user',
+                output_field=models.PositiveSmallIntegerField(),
+                verbose_name='shard key',
+            ),
+        ),
+    ]
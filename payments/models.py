@@ -4,6 +4,8 @@ Contains models for payment processing, gateways, and financial operations.
 """
 
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Cast, Left, Mod, Right, StrIndex
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
@@ -31,6 +33,13 @@ class PaymentStatus(models.TextChoices):
     PARTIALLY_REFUNDED = 'partially_refunded', _('Partially Refunded')
 
 
+class PaymentQuerySet(models.QuerySet):
+    """Custom queryset for payments."""
+    def for_order_status(self, order_id):
+        """Payments for an order, loading only what a status check reads."""
+        return self.filter(order_id=order_id).only('id', 'status', 'amount', 'gateway')
+
+
 class Payment(models.Model):
     """
     Model for tracking payments and transactions.
@@ -66,13 +75,14 @@ class Payment(models.Model):
     )
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     
+    objects = PaymentQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Payment')
         verbose_name_plural = _('Payments')
         db_table = 'payments'
         indexes = [
-            models.Index(fields=['order']),
-            models.Index(fields=['transaction_id']),
+            models.Index(fields=['order', 'status']),
             models.Index(fields=['gateway', 'status']),
             models.Index(fields=['created_at']),
         ]
@@ -95,6 +105,33 @@ class PayoutStatus(models.TextChoices):
     CANCELLED = 'cancelled', _('Cancelled')
 
 
+# Must divide 256: shards come from the user id's last two hex digits
+PAYOUT_SHARD_COUNT = 32
+
+
+def payout_shard_expression():
+    """SQL for uuid.UUID(user_id).int % PAYOUT_SHARD_COUNT, usable as a generated column."""
+    user_hex = Cast('user', models.CharField(max_length=36))
+    
+    def hex_value(digit):
+        return StrIndex(Value('0123456789abcdef'), digit) - 1
+    
+    return Mod(
+        hex_value(Left(Right(user_hex, 2), 1)) * 16 + hex_value(Right(user_hex, 1)),
+        PAYOUT_SHARD_COUNT
+    )
+
+
+class PayoutQuerySet(models.QuerySet):
+    """Custom queryset for payouts."""
+    def pending_for_shard(self, shard_key):
+        """Lock a shard's pending payouts, skipping rows other workers hold."""
+        return self.filter(
+            status=PayoutStatus.PENDING,
+            shard_key=shard_key
+        ).select_for_update(skip_locked=True).order_by('created_at')
+
+
 class Payout(models.Model):
     """
     Model for creator payouts and withdrawals.
@@ -129,16 +166,33 @@ class Payout(models.Model):
         default=Decimal('0.00'),
         help_text=_('Fee charged for the payout')
     )
+    # Computed by the database, so bulk_create() and update() can't skip it
+    shard_key = models.GeneratedField(
+        expression=payout_shard_expression(),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+        db_index=True,
+        verbose_name=_('shard key'),
+        help_text=_('Payout worker shard, derived from the user')
+    )
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     
+    objects = PayoutQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Payout')
         verbose_name_plural = _('Payouts')
         db_table = 'payouts'
         indexes = [
-            models.Index(fields=['user', 'status']),
+            models.Index(fields=['user', 'status', '-created_at']),
             models.Index(fields=['gateway']),
             models.Index(fields=['created_at']),
+            # Pending payout queue for the payout worker
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(status=PayoutStatus.PENDING),
+                name='payout_pending_idx'
+            ),
         ]
     
     def __str__(self):
@@ -294,6 +348,18 @@ class Affiliate(models.Model):
         return f"{self.referrer.email} referred {self.referred.email} ({self.commission_rate}%)"
 
 
+class AffiliateCommissionQuerySet(models.QuerySet):
+    """Custom queryset for affiliate commissions."""
+    def with_paid_status(self):
+        """Annotate is_paid in SQL so list pages need no per-row Python."""
+        return self.annotate(
+            is_paid=models.ExpressionWrapper(
+                models.Q(paid_at__isnull=False),
+                output_field=models.BooleanField()
+            )
+        )
+
+
 class AffiliateCommission(models.Model):
     """
     Model for tracking affiliate commissions.
@@ -316,20 +382,23 @@ class AffiliateCommission(models.Model):
     )
     paid_at = models.DateTimeField(_('paid at'), null=True, blank=True)
     
+    objects = AffiliateCommissionQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Affiliate Commission')
         verbose_name_plural = _('Affiliate Commissions')
         db_table = 'affiliate_commissions'
         indexes = [
-            models.Index(fields=['affiliate']),
+            models.Index(fields=['affiliate', 'paid_at']),
             models.Index(fields=['order']),
             models.Index(fields=['paid_at']),
+            # Commissions still owed to affiliates
+            models.Index(
+                fields=['affiliate'],
+                condition=models.Q(paid_at__isnull=True),
+                name='unpaid_commissions_idx'
+            ),
         ]
     
     def __str__(self):
         return f"Commission {self.commission_amount} for {self.affiliate.referrer.email}"
-    
-    @property
-    def is_paid(self):
-        """Check if commission has been paid."""
-        return self.paid_at is not None
@@ -0,0 +1,54 @@
+"""
+Payment services for the payments app.
+Cached lookups for exchange rates and VAT rates used on the checkout path.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Currency, VATRate
+
+RATE_CACHE_TIMEOUT = 3600  # Rates change at most daily
+
+
+def currency_cache_key(code):
+    return f'payments:fx:{code.upper()}'
+
+
+def vat_rates_cache_key(country):
+    return f'payments:vat_rates:{country.upper()}'
+
+
+def get_rate_to_zar(code):
+    """Get the conversion rate from a currency to ZAR, or None if unknown."""
+    if code.upper() == 'ZAR':
+        return Decimal('1')
+    
+    def fetch():
+        return Currency.objects.filter(code=code.upper()).values_list(
+            'conversion_rate_to_zar', flat=True
+        ).first()
+    
+    return cache.get_or_set(currency_cache_key(code), fetch, RATE_CACHE_TIMEOUT)
+
+
+def get_current_vat_rate(country='ZA', on_date=None):
+    """Get the VAT rate percentage in effect for a country on a date."""
+    on_date = on_date or timezone.localdate()
+    
+    # Cache the country's whole rate history (a handful of rows) so any
+    # date can be answered without a query
+    def fetch():
+        return list(
+            VATRate.objects.filter(country=country.upper())
+            .order_by('-effective_from')
+            .values_list('effective_from', 'rate')
+        )
+    
+    rates = cache.get_or_set(vat_rates_cache_key(country), fetch, RATE_CACHE_TIMEOUT)
+    for effective_from, rate in rates:
+        if effective_from <= on_date:
+            return rate
+    return None
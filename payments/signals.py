@@ -0,0 +1,24 @@
+"""
+Signal handlers for the payments app.
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Currency, VATRate
+from .services import currency_cache_key, vat_rates_cache_key
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def invalidate_currency_rate(sender, instance, **kwargs):
+    """Drop the cached conversion rate when a currency changes."""
+    cache.delete(currency_cache_key(instance.code))
+
+
+@receiver(post_save, sender=VATRate)
+@receiver(post_delete, sender=VATRate)
+def invalidate_vat_rates(sender, instance, **kwargs):
+    """Drop the cached VAT rate history when a country's rates change."""
+    cache.delete(vat_rates_cache_key(instance.country))
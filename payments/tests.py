@@ -1,3 +1,53 @@
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .models import PAYOUT_SHARD_COUNT, Payout
+
+User = get_user_model()
+
+
+class PayoutShardKeyTests(TestCase):
+    """Database-generated payout shard keys."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'creator{index}@example.com', password='password')
+            for index in range(6)
+        ]
+    
+    def assert_sharded_by_user(self, payouts):
+        for payout in payouts:
+            self.assertEqual(payout.shard_key, uuid.UUID(str(payout.user_id)).int % PAYOUT_SHARD_COUNT)
+    
+    def test_create(self):
+        payout = Payout.objects.create(user=self.users[0], amount=Decimal('50.00'))
+        payout.refresh_from_db()
+        
+        self.assert_sharded_by_user([payout])
+    
+    def test_bulk_create(self):
+        Payout.objects.bulk_create([Payout(user=user, amount=Decimal('10.00')) for user in self.users])
+        
+        self.assert_sharded_by_user(Payout.objects.all())
+    
+    def test_follows_user_on_update(self):
+        payout = Payout.objects.create(user=self.users[0], amount=Decimal('50.00'))
+        Payout.objects.filter(pk=payout.pk).update(user=self.users[1])
+        payout.refresh_from_db()
+        
+        self.assertEqual(payout.user, self.users[1])
+        self.assert_sharded_by_user([payout])
+    
+    def test_pending_for_shard(self):
+        Payout.objects.bulk_create([Payout(user=user, amount=Decimal('10.00')) for user in self.users])
+        user = self.users[0]
+        shard_key = uuid.UUID(str(user.pk)).int % PAYOUT_SHARD_COUNT
+        
+        payouts = Payout.objects.pending_for_shard(shard_key)
+        
+        self.assertIn(user.pk, {payout.user_id for payout in payouts})
+        self.assertEqual({payout.shard_key for payout in payouts}, {shard_key})
@@ -1,10 +1,14 @@
+from django.views import View
 from django.views.generic import TemplateView, ListView, FormView
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.urls import reverse
 from django.utils import timezone
+from django.db import transaction
 from orders.models import Order
 
 
@@ -13,7 +17,7 @@ class PaymentProcessView(LoginRequiredMixin, TemplateView):
 
     def get(self, request, order_id=None, *args, **kwargs):
         if order_id:
-            order = get_object_or_404(Order, id=order_id)
+            order = get_object_or_404(Order.objects.prefetch_related('items'), id=order_id)
             context = {
                 'order': order,
                 'order_items': order.items.all(),
@@ -26,18 +30,20 @@ class PaymentProcessView(LoginRequiredMixin, TemplateView):
             order = get_object_or_404(Order, id=order_id)
             
             # Simulate payment processing
-            order.status = Order.OrderStatus.COMPLETED
-            order.payment_status = Order.PaymentStatus.CAPTURED
-            order.paid_at = timezone.now()
-            order.completed_at = timezone.now()
-            order.save()
-            
-            # Fulfill digital products
-            for item in order.items.all():
-                item.is_fulfilled = True
-                item.access_granted = True
-                item.fulfilled_at = timezone.now()
-                item.save()
+            now = timezone.now()
+            with transaction.atomic():
+                order.status = Order.OrderStatus.COMPLETED
+                order.payment_status = Order.PaymentStatus.CAPTURED
+                order.paid_at = now
+                order.completed_at = now
+                order.save()
+                
+                # Fulfill digital products
+                order.items.update(
+                    is_fulfilled=True,
+                    access_granted=True,
+                    fulfilled_at=now
+                )
             
             messages.success(request, 'Payment successful! You can now access your digital products.')
             return redirect('payments:success', order_id=order.id)
@@ -50,7 +56,7 @@ class PaymentSuccessView(LoginRequiredMixin, TemplateView):
 
     def get(self, request, order_id=None, *args, **kwargs):
         if order_id:
-            order = get_object_or_404(Order, id=order_id)
+            order = get_object_or_404(Order.objects.prefetch_related('items'), id=order_id)
             context = {
                 'order': order,
                 'order_items': order.items.all(),
@@ -59,27 +65,23 @@ class PaymentSuccessView(LoginRequiredMixin, TemplateView):
         return HttpResponse('Payment success placeholder')
 
 
-class PaymentCancelledView(LoginRequiredMixin, TemplateView):
-	template_name = 'payments/cancelled.html'
-
+class PaymentCancelledView(LoginRequiredMixin, View):
 	def get(self, request, *args, **kwargs):
 		return HttpResponse('Payment cancelled placeholder')
 
 
-class StripeWebhookView(TemplateView):
+@method_decorator(csrf_exempt, name='dispatch')
+class StripeWebhookView(View):
+	# Only post() is defined, so View answers other methods with 405
 	def post(self, request, *args, **kwargs):
 		return HttpResponse('OK')
 
 
-class PayoutListView(LoginRequiredMixin, TemplateView):
-	template_name = 'payments/payouts.html'
-
+class PayoutListView(LoginRequiredMixin, View):
 	def get(self, request, *args, **kwargs):
 		return HttpResponse('Payouts list placeholder')
 
 
-class PayoutRequestView(LoginRequiredMixin, TemplateView):
-	template_name = 'payments/payout_request.html'
-
+class PayoutRequestView(LoginRequiredMixin, View):
 	def get(self, request, *args, **kwargs):
 		return HttpResponse('Payout request placeholder')
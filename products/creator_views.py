@@ -8,15 +8,23 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import CreateView, UpdateView, DeleteView, ListView
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Count, Sum
 from django.utils.text import slugify
+from django.utils import timezone
+from django.db import transaction, IntegrityError
+from django.contrib.contenttypes.models import ContentType
+from decimal import Decimal, InvalidOperation
+from copy import copy
+import logging
 
 from .models import Product, DigitalDownload, Category, Tag
-from .forms import ProductForm, DigitalDownloadForm, ProductImageUploadForm
+from .forms import ProductForm, DigitalDownloadForm, ProductImageUploadForm, tag_names_prefetch
 from accounts.models import UserRole
 
+logger = logging.getLogger(__name__)
+
 
 class CreatorRequiredMixin(LoginRequiredMixin):
     """Mixin to ensure user is a creator."""
@@ -42,19 +50,37 @@ class CreatorProductListView(CreatorRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        return Product.objects.filter(creator=self.request.user).order_by('-created_at')
+        # The list only renders base product fields, so skip the subtype fetch
+        return (
+            Product.objects.for_creator(self.request.user)
+            .non_polymorphic()
+            .order_by('-created_at')
+        )
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        # Add statistics in a single aggregate over the list's own queryset;
+        # computed first so the paginator can reuse the total
+        stats = self.object_list.aggregate(
+            total_products=Count('id'),
+            published_products=Count('id', filter=Q(status='published')),
+            draft_products=Count('id', filter=Q(status='draft')),
+            total_sales=Sum('purchase_count'),
+        )
+        stats['total_sales'] = stats['total_sales'] or 0
+        self.product_stats = stats
         
-        # Add statistics
-        products = self.get_queryset()
-        context['total_products'] = products.count()
-        context['published_products'] = products.filter(status='published').count()
-        context['draft_products'] = products.filter(status='draft').count()
-        context['total_sales'] = sum(p.purchase_count for p in products)
+        context = super().get_context_data(**kwargs)
+        context.update(stats)
         
         return context
+    
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        # The stats aggregate already counted these rows; skip the COUNT(*)
+        stats = getattr(self, 'product_stats', None)
+        if stats is not None:
+            paginator.count = stats['total_products']
+        return paginator
 
 
 class ProductCreateView(CreatorRequiredMixin, CreateView):
@@ -83,48 +109,54 @@ class ProductCreateView(CreatorRequiredMixin, CreateView):
         
         # Generate slug if not provided
         if not product.slug:
-            from django.utils.text import slugify
             product.slug = slugify(product.name)
         
-        product.save()
-        
-        # Save the tags if provided
-        form.save_m2m()
-        
-        # Handle digital download specific fields
         download_form = DigitalDownloadForm(self.request.POST)
-        if download_form.is_valid():
-            try:
-                # Create DigitalDownload instance
-                from products.models import DigitalDownload
-                download = DigitalDownload()
-                download.product_ptr = product
-                download.id = product.id  # Set the same ID for polymorphic relationship
-                
-                # Copy fields from download form
-                download.delivery_method = download_form.cleaned_data.get('delivery_method', 'instant')
-                download.download_limit = download_form.cleaned_data.get('download_limit')
-                download.expiry_days = download_form.cleaned_data.get('expiry_days')
-                download.license_type = download_form.cleaned_data.get('license_type', '')
-                download.license_terms = download_form.cleaned_data.get('license_terms', '')
-                
-                # Handle download files
-                files_input = download_form.cleaned_data.get('download_files_input', '')
-                if files_input:
-                    files = [url.strip() for url in files_input.split('\n') if url.strip()]
-                    download.download_files = files
-                else:
-                    download.download_files = []
-                
-                download.save()
-                
-                # Update product to reference the download
-                product.polymorphic_ctype_id = download.polymorphic_ctype_id
-                product.save()
-                
-            except Exception as e:
-                # If download creation fails, just continue with basic product
-                print(f"Download creation failed: {e}")
+        
+        with transaction.atomic():
+            product.save()
+            
+            # Save the tags if provided
+            form.save_m2m()
+            
+            # Handle digital download specific fields
+            if download_form.is_valid():
+                try:
+                    with transaction.atomic():
+                        # Create the DigitalDownload row for the saved product
+                        download = DigitalDownload()
+                        download.product_ptr = product
+                        download.id = product.id  # Set the same ID for polymorphic relationship
+                        
+                        # Copy fields from download form
+                        download.delivery_method = download_form.cleaned_data.get('delivery_method', 'instant')
+                        download.download_limit = download_form.cleaned_data.get('download_limit')
+                        download.expiry_days = download_form.cleaned_data.get('expiry_days')
+                        download.license_type = download_form.cleaned_data.get('license_type', '')
+                        download.license_terms = download_form.cleaned_data.get('license_terms', '')
+                        
+                        # Handle download files
+                        files_input = download_form.cleaned_data.get('download_files_input', '')
+                        if files_input:
+                            files = [url.strip() for url in files_input.split('\n') if url.strip()]
+                            download.download_files = files
+                        else:
+                            download.download_files = []
+                        
+                        # Raw save inserts only the subtype row; a regular save()
+                        # would rewrite the parent product from this blank instance
+                        download.save_base(raw=True, force_insert=True)
+                        
+                        # Point the product at its subtype without re-saving it
+                        Product.objects.filter(pk=product.pk).update(
+                            polymorphic_ctype=ContentType.objects.get_for_model(
+                                DigitalDownload, for_concrete_model=False
+                            )
+                        )
+                    
+                except IntegrityError:
+                    # If download creation fails, just continue with basic product
+                    logger.exception("Download creation failed for product %s", product.pk)
         
         messages.success(self.request, f'Product "{product.name}" created successfully!')
         return redirect('products:creator_list')
@@ -138,7 +170,9 @@ class ProductUpdateView(CreatorRequiredMixin, UpdateView):
     context_object_name = 'product'
     
     def get_queryset(self):
-        return Product.objects.filter(creator=self.request.user)
+        return Product.objects.for_creator(self.request.user).prefetch_related(
+            tag_names_prefetch()
+        )
     
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -148,11 +182,10 @@ class ProductUpdateView(CreatorRequiredMixin, UpdateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get digital download instance if it exists
-        try:
-            download = DigitalDownload.objects.get(id=self.object.id)
-            context['download_form'] = DigitalDownloadForm(instance=download)
-        except DigitalDownload.DoesNotExist:
+        # The polymorphic queryset already returns the DigitalDownload subtype
+        if isinstance(self.object, DigitalDownload):
+            context['download_form'] = DigitalDownloadForm(instance=self.object)
+        else:
             context['download_form'] = DigitalDownloadForm()
         
         context['image_form'] = ProductImageUploadForm()
@@ -162,10 +195,9 @@ class ProductUpdateView(CreatorRequiredMixin, UpdateView):
         product = form.save()
         
         # Handle digital download form
-        try:
-            download = DigitalDownload.objects.get(id=product.id)
-            download_form = DigitalDownloadForm(self.request.POST, instance=download)
-        except DigitalDownload.DoesNotExist:
+        if isinstance(product, DigitalDownload):
+            download_form = DigitalDownloadForm(self.request.POST, instance=product)
+        else:
             download_form = DigitalDownloadForm(self.request.POST)
         
         if download_form.is_valid():
@@ -188,29 +220,44 @@ class ProductDeleteView(CreatorRequiredMixin, DeleteView):
     success_url = reverse_lazy('products:creator_list')
     
     def get_queryset(self):
-        return Product.objects.filter(creator=self.request.user)
+        return Product.objects.for_creator(self.request.user)
+    
+    def post(self, request, *args, **kwargs):
+        return self.delete(request, *args, **kwargs)
     
     def delete(self, request, *args, **kwargs):
-        product = self.get_object()
-        product_name = product.name
-        result = super().delete(request, *args, **kwargs)
+        # Delete through the queryset so the product is never instantiated
+        with transaction.atomic():
+            products = self.get_queryset().filter(pk=self.kwargs['pk'])
+            product_name = products.values_list('name', flat=True).first()
+            if product_name is None:
+                raise Http404("Product not found")
+            products.delete()
         messages.success(request, f'Product "{product_name}" deleted successfully!')
-        return result
+        return redirect(self.success_url)
 
 
 @login_required
 def product_quick_edit(request, product_id):
     """Quick edit product via AJAX."""
-    product = get_object_or_404(Product, id=product_id, creator=request.user)
-    
     if request.method == 'POST':
         field = request.POST.get('field')
         value = request.POST.get('value')
         
         allowed_fields = ['name', 'price', 'status', 'visibility']
         if field in allowed_fields:
-            setattr(product, field, value)
-            product.save(update_fields=[field])
+            if field == 'price':
+                try:
+                    value = Decimal(value)
+                except (InvalidOperation, TypeError):
+                    return JsonResponse({'success': False, 'message': 'Invalid price'})
+            
+            # Single UPDATE; the creator filter enforces ownership
+            updated = Product.objects.for_creator(request.user).filter(id=product_id).update(
+                **{field: value, 'updated_at': timezone.now()}
+            )
+            if not updated:
+                raise Http404('No product matches the given query.')
             
             return JsonResponse({
                 'success': True,
@@ -227,33 +274,29 @@ def product_duplicate(request, product_id):
         messages.error(request, 'You need to be a creator to duplicate products.')
         return redirect('accounts:upgrade_to_creator')
     
-    original = get_object_or_404(Product, id=product_id, creator=request.user)
+    # Polymorphic fetch: a DigitalDownload (or other subtype) comes back with
+    # its own fields loaded, so one copy duplicates both table rows
+    original = get_object_or_404(Product.objects.for_creator(request.user), id=product_id)
     
-    # Create duplicate
-    duplicate = Product.objects.get(id=original.id)
-    duplicate.pk = None
-    duplicate.name = f"{original.name} (Copy)"
-    duplicate.slug = f"{original.slug}-copy"
-    duplicate.status = 'draft'
-    duplicate.save()
-    
-    # Copy tags
-    duplicate.tags.set(original.tags.all())
-    
-    # Copy digital download data if exists
-    try:
-        original_download = DigitalDownload.objects.get(id=original.id)
-        download = DigitalDownload()
-        download.product_ptr = duplicate
-        download.delivery_method = original_download.delivery_method
-        download.download_limit = original_download.download_limit
-        download.expiry_days = original_download.expiry_days
-        download.license_type = original_download.license_type
-        download.license_terms = original_download.license_terms
-        download.download_files = original_download.download_files.copy()
-        download.save()
-    except DigitalDownload.DoesNotExist:
-        pass
+    with transaction.atomic():
+        # Create duplicate
+        duplicate = copy(original)
+        duplicate.pk = None
+        duplicate.id = None
+        duplicate._state.adding = True
+        duplicate.name = f"{original.name} (Copy)"
+        duplicate.slug = f"{original.slug}-copy"
+        duplicate.status = 'draft'
+        if isinstance(original, DigitalDownload):
+            duplicate.download_files = original.download_files.copy()
+        duplicate.save()
+        
+        # Copy tags
+        ProductTag = Product.tags.through
+        ProductTag.objects.bulk_create([
+            ProductTag(product_id=duplicate.pk, tag_id=tag_id)
+            for tag_id in original.tags.values_list('id', flat=True)
+        ])
     
     messages.success(request, f'Product "{original.name}" duplicated successfully!')
     return redirect('products:creator_edit', pk=duplicate.pk)
@@ -287,18 +330,16 @@ def product_analytics(request, product_id):
         messages.error(request, 'You need to be a creator to view analytics.')
         return redirect('accounts:upgrade_to_creator')
     
-    product = get_object_or_404(Product, id=product_id, creator=request.user)
+    product = get_object_or_404(Product.objects.for_creator(request.user), id=product_id)
     
     # For now, return basic analytics
     # In production, this would include real analytics data
     analytics_data = {
         'views': product.view_count,
         'purchases': product.purchase_count,
-        'revenue': sum(
-            item.total_price for item in product.order_items.filter(
-                order__status='completed'
-            )
-        ),
+        'revenue': product.order_items.filter(
+            order__status='completed'
+        ).aggregate(revenue=Sum('total_price'))['revenue'] or 0,
         'conversion_rate': (
             (product.purchase_count / product.view_count * 100) 
             if product.view_count > 0 else 0
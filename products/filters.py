@@ -4,8 +4,34 @@ Includes advanced filtering, search, and sorting capabilities.
 """
 
 import django_filters
-from django.db.models import Q
-from .models import Product, Category, Tag
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Avg, Count, Exists, F, OuterRef, Prefetch, Q, Subquery
+from django.utils import timezone
+from orders.models import OrderItem
+from .models import Product, Category, Tag, ProductReview
+from .search import search_products
+from .signals import CATEGORY_CHILDREN_CACHE_KEY
+
+
+# Content type model names of the polymorphic product subtypes
+PRODUCT_TYPE_MODELS = frozenset({
+    'digitaldownload', 'membership', 'community', 'course', 'event'
+})
+
+CATEGORY_CHILDREN_CACHE_TIMEOUT = 300
+
+
+def category_children():
+    """Return {category id: child ids} for every category, cached across requests."""
+    def load():
+        children = {}
+        for category_id, parent_id in Category.objects.values_list('id', 'parent_id'):
+            children.setdefault(category_id, [])
+            children.setdefault(parent_id, []).append(category_id)
+        return children
+    
+    return cache.get_or_set(CATEGORY_CHILDREN_CACHE_KEY, load, CATEGORY_CHILDREN_CACHE_TIMEOUT)
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -29,7 +55,7 @@ class ProductFilter(django_filters.FilterSet):
     
     # Status and visibility
     status = django_filters.ChoiceFilter(choices=Product.ProductStatus.choices)
-    visibility = django_filters.ChoiceFilter(choices=Product.ProductVisibility.choices)
+    visibility = django_filters.ChoiceFilter(choices=Product.VisibilityType.choices)
     
     # Tags (multiple selection)
     tags = django_filters.ModelMultipleChoiceFilter(
@@ -40,7 +66,7 @@ class ProductFilter(django_filters.FilterSet):
     tag_names = django_filters.CharFilter(method='filter_by_tag_names')
     
     # Category hierarchy
-    category_tree = django_filters.NumberFilter(method='filter_by_category_tree')
+    category_tree = django_filters.UUIDFilter(method='filter_by_category_tree')
     
     # Date filters
     created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
@@ -71,73 +97,92 @@ class ProductFilter(django_filters.FilterSet):
             'min_rating', 'min_sales'
         ]
     
+    @property
+    def qs(self):
+        """Filtered products with the relations list serializers read."""
+        if not hasattr(self, '_related_qs'):
+            self._related_qs = super().qs.select_related(
+                'category', 'creator', 'polymorphic_ctype'
+            ).prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'slug'))
+            )
+        return self._related_qs
+    
     def filter_on_sale(self, queryset, name, value):
         """Filter products that are on sale."""
         if value:
-            return queryset.filter(sale_price__isnull=False, sale_price__lt=models.F('price'))
-        return queryset.filter(Q(sale_price__isnull=True) | Q(sale_price__gte=models.F('price')))
+            return queryset.filter(sale_price__isnull=False, sale_price__lt=F('price'))
+        return queryset.filter(Q(sale_price__isnull=True) | Q(sale_price__gte=F('price')))
     
     def filter_by_tag_names(self, queryset, name, value):
         """Filter by tag names (comma-separated)."""
         if value:
-            tag_names = [name.strip() for name in value.split(',')]
-            return queryset.filter(tags__name__in=tag_names).distinct()
+            # Tag names are stored lowercased, so the unique name index applies
+            tag_names = [name.strip().lower() for name in value.split(',')]
+            return queryset.filter(Exists(
+                Product.tags.through.objects.filter(
+                    product_id=OuterRef('pk'),
+                    tag__name__in=tag_names
+                )
+            ))
         return queryset
     
     def filter_by_category_tree(self, queryset, name, value):
         """Filter by category and its subcategories."""
-        try:
-            category = Category.objects.get(id=value)
-            # Get all subcategories
-            subcategories = category.get_descendants(include_self=True)
-            return queryset.filter(category__in=subcategories)
-        except Category.DoesNotExist:
+        # Walk the cached parent links; the category signals drop the cache
+        children = category_children()
+        if value not in children:
             return queryset
+        
+        subtree = [value]
+        for category_id in subtree:
+            subtree.extend(children.get(category_id, ()))
+        return queryset.filter(category_id__in=subtree)
     
     def filter_by_product_type(self, queryset, name, value):
         """Filter by product type (polymorphic)."""
-        type_map = {
-            'digitaldownload': 'DigitalDownload',
-            'membership': 'Membership',
-            'community': 'Community',
-            'course': 'Course',
-            'event': 'Event'
-        }
-        
-        if value.lower() in type_map:
-            model_name = type_map[value.lower()]
-            return queryset.filter(polymorphic_ctype__model=model_name.lower())
+        model_name = value.lower()
+        if model_name in PRODUCT_TYPE_MODELS:
+            # ContentType's manager caches this lookup, so no JOIN and no query
+            content_type = ContentType.objects.get_by_natural_key('products', model_name)
+            return queryset.filter(polymorphic_ctype_id=content_type.pk)
         return queryset
     
     def filter_search(self, queryset, name, value):
         """Search across multiple fields."""
-        if value:
-            return queryset.filter(
-                Q(name__icontains=value) |
-                Q(description__icontains=value) |
-                Q(short_description__icontains=value) |
-                Q(tags__name__icontains=value) |
-                Q(category__name__icontains=value) |
-                Q(creator__first_name__icontains=value) |
-                Q(creator__last_name__icontains=value)
-            ).distinct()
-        return queryset
+        if not value:
+            return queryset
+        
+        return search_products(queryset, value, (
+            Q(name__icontains=value) |
+            Q(description__icontains=value) |
+            Q(short_description__icontains=value) |
+            Q(tags__name__icontains=value) |
+            Q(category__name__icontains=value) |
+            Q(creator__first_name__icontains=value) |
+            Q(creator__last_name__icontains=value)
+        ))
     
     def filter_min_rating(self, queryset, name, value):
         """Filter by minimum average rating."""
-        from django.db.models import Avg
         if value:
+            # Subquery aggregates so combining with min_sales doesn't multiply rows
+            ratings = ProductReview.objects.filter(
+                product=OuterRef('pk')
+            ).order_by().values('product').annotate(average=Avg('rating')).values('average')
             return queryset.annotate(
-                avg_rating=Avg('reviews__rating')
+                avg_rating=Subquery(ratings)
             ).filter(avg_rating__gte=value)
         return queryset
     
     def filter_min_sales(self, queryset, name, value):
         """Filter by minimum sales count."""
-        from django.db.models import Count
         if value:
+            sales = OrderItem.objects.filter(
+                product=OuterRef('pk')
+            ).order_by().values('product').annotate(total=Count('id')).values('total')
             return queryset.annotate(
-                sales_count=Count('order_items')
+                sales_count=Subquery(sales)
             ).filter(sales_count__gte=value)
         return queryset
 
@@ -223,7 +268,6 @@ class EventFilter(ProductFilter):
     
     def filter_registration_open(self, queryset, name, value):
         """Filter events with open registration."""
-        from django.utils import timezone
         now = timezone.now()
         
         if value:
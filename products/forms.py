@@ -3,12 +3,51 @@ Forms for the products app.
 """
 
 from django import forms
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.utils.text import slugify
+from functools import lru_cache
+import re
 from .models import Product, DigitalDownload, Category, Tag
+from .signals import ACTIVE_CATEGORY_CHOICES_CACHE_KEY
+
+ACTIVE_CATEGORY_CHOICES_CACHE_TIMEOUT = 300
+
+VALID_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+SLUG_PATTERN = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+
+@lru_cache(maxsize=1024)
+def cached_slugify(value):
+    """slugify() with memoised results; values that are already slugs pass through."""
+    if SLUG_PATTERN.fullmatch(value):
+        return value
+    return slugify(value)
+
+
+def active_category_choices():
+    """Return (id, name) choices for active categories, cached across requests."""
+    return cache.get_or_set(
+        ACTIVE_CATEGORY_CHOICES_CACHE_KEY,
+        lambda: list(Category.objects.filter(is_active=True).values_list('id', 'name')),
+        ACTIVE_CATEGORY_CHOICES_CACHE_TIMEOUT
+    )
+
+
+def tag_names_prefetch():
+    """Prefetch for product tags that loads only what the tag field shows."""
+    return Prefetch('tags', queryset=Tag.objects.only('id', 'name'))
 
 
 class ProductForm(forms.ModelForm):
-    """Form for creating/editing products."""
+    """
+    Form for creating/editing products.
+    
+    Pass instances fetched with tag_names_prefetch() so the tags field is
+    filled from the prefetch cache instead of a query per form.
+    """
     
     tags_input = forms.CharField(
         required=False,
@@ -87,10 +126,10 @@ class ProductForm(forms.ModelForm):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         
-        # If editing existing product, populate tags
+        # If editing existing product, populate tags (served from any prefetch)
         if self.instance and self.instance.pk:
             tags = self.instance.tags.all()
-            self.fields['tags_input'].initial = ', '.join([tag.name for tag in tags])
+            self.fields['tags_input'].initial = ', '.join(tag.name for tag in tags)
     
     def clean_price(self):
         price = self.cleaned_data.get('price')
@@ -118,7 +157,6 @@ class ProductForm(forms.ModelForm):
         
         # Generate slug from name
         if not product.slug:
-            from django.utils.text import slugify
             product.slug = slugify(product.name)
         
         if commit:
@@ -127,15 +165,16 @@ class ProductForm(forms.ModelForm):
             # Handle tags
             tags_input = self.cleaned_data.get('tags_input', '')
             if tags_input:
-                tag_names = [name.strip() for name in tags_input.split(',') if name.strip()]
-                tags = []
-                for tag_name in tag_names:
-                    tag, created = Tag.objects.get_or_create(
-                        name=tag_name.lower(),
-                        defaults={'slug': slugify(tag_name)}
-                    )
-                    tags.append(tag)
-                product.tags.set(tags)
+                tag_names = list(dict.fromkeys(
+                    name.strip().lower() for name in tags_input.split(',') if name.strip()
+                ))
+                # Insert the missing tags in one statement, then load them all
+                existing = set(Tag.objects.filter(name__in=tag_names).values_list('name', flat=True))
+                Tag.objects.bulk_create(
+                    [Tag(name=name, slug=cached_slugify(name)) for name in tag_names if name not in existing],
+                    ignore_conflicts=True
+                )
+                product.tags.set(Tag.objects.filter(name__in=tag_names))
         
         return product
 
@@ -227,8 +266,7 @@ class ProductImageUploadForm(forms.Form):
         url = self.cleaned_data.get('image_url')
         
         # Basic validation for image file extensions
-        valid_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-        if not any(url.lower().endswith(ext) for ext in valid_extensions):
+        if not url.lower().endswith(VALID_IMAGE_EXTENSIONS):
             raise ValidationError('Please provide a valid image URL ending with .jpg, .png, .webp, or .gif')
         
         return url
@@ -287,3 +325,10 @@ class ProductSearchForm(forms.Form):
             'class': 'px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500'
         })
     )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Render the options from cache; the queryset is only hit on validation
+        category = self.fields['category']
+        category.choices = [('', category.empty_label)] + active_category_choices()
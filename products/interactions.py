@@ -0,0 +1,115 @@
+"""
+Per-user product interaction history and buffered view counts for the marketplace.
+Uses native Redis commands when the default cache is Redis.
+"""
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db.models import Case, F, PositiveIntegerField, When
+import json
+
+from .models import Product
+
+
+INTERACTION_HISTORY_LENGTH = 100
+INTERACTION_HISTORY_TIMEOUT = 86400
+VIEW_COUNT_DIRTY_KEY = 'view_count:dirty'
+
+
+def get_redis_client():
+    """Return a raw client for the default cache, or None when it isn't Redis."""
+    default_cache = caches['default']
+    if isinstance(default_cache, RedisCache):
+        return default_cache._cache.get_client(write=True)
+    return None
+
+
+def interactions_key(user_id):
+    """Cache key holding a user's interaction history."""
+    return f"interactions:user:{user_id}"
+
+
+def record_interaction(user_id, interaction):
+    """Append an interaction, keeping only the most recent ones."""
+    key = interactions_key(user_id)
+    client = get_redis_client()
+
+    if client is None:
+        interactions = cache.get(key, [])
+        interactions.append(interaction)
+        cache.set(key, interactions[-INTERACTION_HISTORY_LENGTH:], INTERACTION_HISTORY_TIMEOUT)
+        return
+
+    # Push, trim and refresh the TTL atomically, with no read-modify-write
+    pipe = client.pipeline()
+    pipe.lpush(key, json.dumps(interaction))
+    pipe.ltrim(key, 0, INTERACTION_HISTORY_LENGTH - 1)
+    pipe.expire(key, INTERACTION_HISTORY_TIMEOUT)
+    pipe.execute()
+
+
+def get_interactions(user_id):
+    """Return the user's recent interactions, oldest first."""
+    key = interactions_key(user_id)
+    client = get_redis_client()
+
+    if client is None:
+        return cache.get(key, [])
+
+    # LPUSH keeps the newest first
+    return [
+        json.loads(item)
+        for item in reversed(client.lrange(key, 0, INTERACTION_HISTORY_LENGTH - 1))
+    ]
+
+
+def view_count_key(product_id):
+    """Redis key buffering a product's unflushed views."""
+    return f"view_count:buf:{product_id}"
+
+
+def buffer_product_view(product_id):
+    """Count a product view, buffered in Redis until flush_view_counts runs."""
+    client = get_redis_client()
+
+    if client is None:
+        Product.objects.filter(pk=product_id).update(view_count=F('view_count') + 1)
+        return
+
+    pipe = client.pipeline()
+    pipe.incr(view_count_key(product_id))
+    pipe.sadd(VIEW_COUNT_DIRTY_KEY, str(product_id))
+    pipe.execute()
+
+
+def flush_view_counts():
+    """Add the buffered views to Product.view_count in one UPDATE; returns products touched."""
+    client = get_redis_client()
+    if client is None:
+        return 0
+
+    product_ids = client.spop(VIEW_COUNT_DIRTY_KEY, client.scard(VIEW_COUNT_DIRTY_KEY))
+    if not product_ids:
+        return 0
+    product_ids = [product_id.decode() for product_id in product_ids]
+
+    # GETDEL hands each buffer over atomically; views arriving afterwards
+    # start a new buffer and re-mark the product dirty
+    pipe = client.pipeline()
+    for product_id in product_ids:
+        pipe.getdel(view_count_key(product_id))
+    deltas = {
+        product_id: int(delta)
+        for product_id, delta in zip(product_ids, pipe.execute())
+        if delta
+    }
+    if not deltas:
+        return 0
+
+    return Product.objects.filter(pk__in=deltas).update(
+        view_count=Case(
+            *[When(pk=product_id, then=F('view_count') + delta) for product_id, delta in deltas.items()],
+            default=F('view_count'),
+            output_field=PositiveIntegerField()
+        )
+    )
@@ -4,17 +4,234 @@ Management command to create sample data for the marketplace.
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils.text import slugify
 from decimal import Decimal
+import csv
+import io
+import json
 import random
 
 from products.models import Category, Tag, Product, DigitalDownload, Course, Event
+from products.signals import ACTIVE_CATEGORY_CHOICES_CACHE_KEY, CATEGORY_CHILDREN_CACHE_KEY
 from accounts.models import UserProfile, CreatorProfile
 
 User = get_user_model()
 
 
+SAMPLE_CATEGORIES = [
+    {'name': 'Digital Downloads', 'slug': 'digital-downloads', 'description': 'Templates, graphics, and digital files'},
+    {'name': 'Online Courses', 'slug': 'online-courses', 'description': 'Educational content and training'},
+    {'name': 'Ebooks & Guides', 'slug': 'ebooks-guides', 'description': 'Written content and how-to guides'},
+    {'name': 'Software & Tools', 'slug': 'software-tools', 'description': 'Applications and digital tools'},
+    {'name': 'Music & Audio', 'slug': 'music-audio', 'description': 'Audio files, music, and sound effects'},
+    {'name': 'Photography', 'slug': 'photography', 'description': 'Stock photos and image collections'},
+    {'name': 'Business Templates', 'slug': 'business-templates', 'description': 'Templates for business use'},
+    {'name': 'Events & Workshops', 'slug': 'events-workshops', 'description': 'Live events and workshops'},
+]
+
+
+SAMPLE_TAG_NAMES = [
+    'Design', 'Business', 'Marketing', 'Photography', 'Education',
+    'Technology', 'Health', 'Finance', 'Creative', 'Productivity',
+    'Social Media', 'Web Development', 'Mobile App', 'Data Science',
+    'Artificial Intelligence', 'South Africa', 'Afrikaans', 'isiZulu',
+    'Beginner', 'Advanced', 'Professional', 'Personal Development',
+    'Entrepreneurship', 'Small Business', 'Freelancing', 'Digital Marketing'
+]
+
+
+SAMPLE_CREATORS = [
+    {
+        'email': 'thabo@example.com',
+        'first_name': 'Thabo',
+        'last_name': 'Mthembu',
+        'store_name': 'Thabo Design Studio',
+        'store_description': 'Graphic designer from Johannesburg specializing in branding and digital art.'
+    },
+    {
+        'email': 'sarah@example.com',
+        'first_name': 'Sarah',
+        'last_name': 'van der Merwe',
+        'store_name': 'Cape Learning Hub',
+        'store_description': 'Educational content creator and online course instructor from Cape Town.'
+    },
+    {
+        'email': 'amahle@example.com',
+        'first_name': 'Amahle',
+        'last_name': 'Ndlovu',
+        'store_name': 'Code Mastery KZN',
+        'store_description': 'Software developer and coding instructor from Durban.'
+    },
+    {
+        'email': 'pieter@example.com',
+        'first_name': 'Pieter',
+        'last_name': 'Botha',
+        'store_name': 'Wild SA Photography',
+        'store_description': 'Wildlife and landscape photographer specializing in South African scenes.'
+    },
+    {
+        'email': 'nomsa@example.com',
+        'first_name': 'Nomsa',
+        'last_name': 'Zulu',
+        'store_name': 'Business Growth SA',
+        'store_description': 'Business consultant and entrepreneur helping SA SMEs grow.'
+    }
+]
+
+
+SAMPLE_PRODUCTS = [
+    # Digital Downloads
+    {
+        'name': 'South African Business Card Templates',
+        'description': 'Professional business card templates designed for South African businesses. Includes 20 unique designs with local themes and contact formats.',
+        'short_description': 'Professional SA business card templates with local themes.',
+        'price': Decimal('149.00'),
+        'category': 'digital-downloads',
+        'product_type': 'digital_download',
+        'tags': ['Design', 'Business', 'South Africa', 'Professional']
+    },
+    {
+        'name': 'Heritage Day Marketing Kit',
+        'description': 'Complete marketing kit for Heritage Day celebrations. Includes social media templates, poster designs, and promotional materials.',
+        'short_description': 'Complete Heritage Day marketing templates and designs.',
+        'price': Decimal('299.00'),
+        'category': 'digital-downloads',
+        'product_type': 'digital_download',
+        'tags': ['Marketing', 'Design', 'South Africa', 'Social Media']
+    },
+    {
+        'name': 'Ubuntu Philosophy Presentation Template',
+        'description': 'Beautiful presentation templates incorporating Ubuntu philosophy and African design elements. Perfect for corporate and educational use.',
+        'short_description': 'Ubuntu-inspired presentation templates with African design.',
+        'price': Decimal('199.00'),
+        'category': 'business-templates',
+        'product_type': 'digital_download',
+        'tags': ['Business', 'Design', 'South Africa', 'Professional']
+    },
+
+    # Courses
+    {
+        'name': 'Digital Marketing for SA Small Business',
+        'description': 'Complete course on digital marketing strategies specifically for South African small businesses. Covers local SEO, social media, and online advertising.',
+        'short_description': 'Digital marketing course tailored for SA small businesses.',
+        'price': Decimal('1299.00'),
+        'category': 'online-courses',
+        'product_type': 'course',
+        'tags': ['Digital Marketing', 'Small Business', 'South Africa', 'Education']
+    },
+    {
+        'name': 'Python Programming in Afrikaans',
+        'description': 'Learn Python programming with explanations in Afrikaans. Perfect for Afrikaans-speaking developers starting their coding journey.',
+        'short_description': 'Python programming course taught in Afrikaans.',
+        'price': Decimal('899.00'),
+        'category': 'online-courses',
+        'product_type': 'course',
+        'tags': ['Technology', 'Programming', 'Afrikaans', 'Education', 'Beginner']
+    },
+    {
+        'name': 'Photography of South African Wildlife',
+        'description': 'Master wildlife photography techniques with focus on South African animals and landscapes. Includes location guides and equipment recommendations.',
+        'short_description': 'Wildlife photography course for SA animals and landscapes.',
+        'price': Decimal('1599.00'),
+        'category': 'online-courses',
+        'product_type': 'course',
+        'tags': ['Photography', 'South Africa', 'Education', 'Advanced']
+    },
+
+    # Ebooks
+    {
+        'name': 'Starting a Business in South Africa 2024',
+        'description': 'Comprehensive guide to starting a business in South Africa. Covers legal requirements, tax obligations, and practical tips for entrepreneurs.',
+        'short_description': 'Complete guide to starting a business in SA.',
+        'price': Decimal('249.00'),
+        'category': 'ebooks-guides',
+        'product_type': 'digital_download',
+        'tags': ['Business', 'Entrepreneurship', 'South Africa', 'Legal']
+    },
+    {
+        'name': 'Township Tourism: A Guide for Entrepreneurs',
+        'description': 'How to start and run a successful township tourism business. Includes case studies, marketing strategies, and community engagement tips.',
+        'short_description': 'Guide to starting township tourism businesses.',
+        'price': Decimal('199.00'),
+        'category': 'ebooks-guides',
+        'product_type': 'digital_download',
+        'tags': ['Tourism', 'Entrepreneurship', 'South Africa', 'Small Business']
+    },
+
+    # Music & Audio
+    {
+        'name': 'Amapiano Loops & Samples Pack',
+        'description': 'High-quality Amapiano loops and samples recorded by professional South African producers. Perfect for music production.',
+        'short_description': 'Professional Amapiano loops and samples for producers.',
+        'price': Decimal('399.00'),
+        'category': 'music-audio',
+        'product_type': 'digital_download',
+        'tags': ['Music', 'South Africa', 'Amapiano', 'Creative']
+    },
+    {
+        'name': 'Traditional African Drums Sample Library',
+        'description': 'Authentic African drum samples recorded live. Includes djembe, talking drums, and other traditional percussion instruments.',
+        'short_description': 'Authentic African drum samples and loops.',
+        'price': Decimal('299.00'),
+        'category': 'music-audio',
+        'product_type': 'digital_download',
+        'tags': ['Music', 'South Africa', 'Traditional', 'Creative']
+    },
+
+    # Photography
+    {
+        'name': 'Cape Town Stock Photo Collection',
+        'description': '100 high-resolution stock photos of Cape Town landmarks, Table Mountain, and city scenes. Commercial use included.',
+        'short_description': 'High-res Cape Town stock photos for commercial use.',
+        'price': Decimal('499.00'),
+        'category': 'photography',
+        'product_type': 'digital_download',
+        'tags': ['Photography', 'Cape Town', 'South Africa', 'Stock Photos']
+    },
+    {
+        'name': 'Kruger National Park Wildlife Photos',
+        'description': 'Stunning wildlife photography from Kruger National Park. Features the Big 5 and other African animals in their natural habitat.',
+        'short_description': 'Professional Kruger Park wildlife photography collection.',
+        'price': Decimal('699.00'),
+        'category': 'photography',
+        'product_type': 'digital_download',
+        'tags': ['Photography', 'Wildlife', 'South Africa', 'Nature']
+    },
+
+    # Events
+    {
+        'name': 'Digital Transformation Workshop',
+        'description': 'Live online workshop on digital transformation for South African businesses. Learn practical strategies and tools.',
+        'short_description': 'Live workshop on digital transformation for SA businesses.',
+        'price': Decimal('799.00'),
+        'category': 'events-workshops',
+        'product_type': 'event',
+        'tags': ['Business', 'Technology', 'Digital Transformation', 'Education']
+    },
+    {
+        'name': 'African Design Thinking Masterclass',
+        'description': 'Interactive masterclass on applying African design principles to modern UX/UI design. Includes hands-on exercises.',
+        'short_description': 'Masterclass on African-inspired design thinking.',
+        'price': Decimal('999.00'),
+        'category': 'events-workshops',
+        'product_type': 'event',
+        'tags': ['Design', 'UX/UI', 'South Africa', 'Creative', 'Education']
+    }
+]
+
+
 class Command(BaseCommand):
     help = 'Creates sample data for the marketplace'
+    verbosity = 1
+    clear = False
+    rng = random.Random(0)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -22,28 +239,65 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before creating new data',
         )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1,
+            help='Number of copies of each sample product to create, for load testing',
+        )
+        parser.add_argument(
+            '--use-copy',
+            action='store_true',
+            help='Load base product rows with COPY FROM STDIN (PostgreSQL only), for large --count runs',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed, so repeated runs produce the same sample data',
+        )
 
     def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.rng = random.Random(options['seed'])
+        self.clear = options['clear']
         if options['clear']:
             self.stdout.write('Clearing existing data...')
-            Product.objects.all().delete()
-            Category.objects.all().delete()
-            Tag.objects.all().delete()
-            User.objects.filter(is_superuser=False).delete()
+            with transaction.atomic():
+                # Flush the catalogue tables wholesale (TRUNCATE ... CASCADE on
+                # PostgreSQL) instead of loading and cascading row by row
+                tables = [
+                    model._meta.db_table
+                    for model in apps.get_app_config('products').get_models(include_auto_created=True)
+                ]
+                connection.ops.execute_sql_flush(
+                    connection.ops.sql_flush(no_style(), tables, allow_cascade=True)
+                )
+                User.objects.filter(is_superuser=False).delete()
 
         self.stdout.write('Creating sample data...')
         
-        # Create categories
-        categories = self.create_categories()
-        
-        # Create tags
-        tags = self.create_tags()
-        
-        # Create sample creators
-        creators = self.create_creators()
+        # Commit all sample rows together rather than one statement at a time
+        with transaction.atomic():
+            # Create categories
+            categories = self.create_categories()
+            
+            # Create tags
+            tags = self.create_tags()
+            
+            # Create sample creators
+            creators = self.create_creators()
+            
+            # Create sample products
+            self.create_products(
+                categories, tags, creators,
+                count=options['count'],
+                use_copy=options['use_copy']
+            )
         
-        # Create sample products
-        self.create_products(categories, tags, creators)
+        # Bulk inserts and table flushes skip the Category signals, so drop
+        # the cached category choices and tree once here instead
+        cache.delete_many([ACTIVE_CATEGORY_CHOICES_CACHE_KEY, CATEGORY_CHILDREN_CACHE_KEY])
         
         self.stdout.write(
             self.style.SUCCESS('Successfully created sample data!')
@@ -51,339 +305,238 @@ class Command(BaseCommand):
 
     def create_categories(self):
         """Create sample categories."""
-        categories_data = [
-            {'name': 'Digital Downloads', 'slug': 'digital-downloads', 'description': 'Templates, graphics, and digital files'},
-            {'name': 'Online Courses', 'slug': 'online-courses', 'description': 'Educational content and training'},
-            {'name': 'Ebooks & Guides', 'slug': 'ebooks-guides', 'description': 'Written content and how-to guides'},
-            {'name': 'Software & Tools', 'slug': 'software-tools', 'description': 'Applications and digital tools'},
-            {'name': 'Music & Audio', 'slug': 'music-audio', 'description': 'Audio files, music, and sound effects'},
-            {'name': 'Photography', 'slug': 'photography', 'description': 'Stock photos and image collections'},
-            {'name': 'Business Templates', 'slug': 'business-templates', 'description': 'Templates for business use'},
-            {'name': 'Events & Workshops', 'slug': 'events-workshops', 'description': 'Live events and workshops'},
-        ]
-        
-        categories = []
-        for cat_data in categories_data:
-            category, created = Category.objects.get_or_create(
+        # Freshly flushed tables have nothing to diff against
+        existing = {} if self.clear else Category.objects.filter(
+            slug__in=[cat_data['slug'] for cat_data in SAMPLE_CATEGORIES]
+        ).in_bulk(field_name='slug')
+        new_categories = [
+            Category(
                 slug=cat_data['slug'],
-                defaults={
-                    'name': cat_data['name'],
-                    'description': cat_data['description'],
-                    'is_active': True,
-                    'sort_order': len(categories)
-                }
+                name=cat_data['name'],
+                description=cat_data['description'],
+                is_active=True,
+                sort_order=i
             )
-            categories.append(category)
-            if created:
-                self.stdout.write(f'Created category: {category.name}')
+            for i, cat_data in enumerate(SAMPLE_CATEGORIES)
+            if cat_data['slug'] not in existing
+        ]
+        Category.objects.bulk_create(new_categories, batch_size=settings.SAMPLE_DATA_BATCH_SIZE)
         
-        return categories
+        self.stdout.write(f'Created {len(new_categories)} categories')
+        return list(existing.values()) + new_categories
 
     def create_tags(self):
         """Create sample tags."""
-        tag_names = [
-            'Design', 'Business', 'Marketing', 'Photography', 'Education',
-            'Technology', 'Health', 'Finance', 'Creative', 'Productivity',
-            'Social Media', 'Web Development', 'Mobile App', 'Data Science',
-            'Artificial Intelligence', 'South Africa', 'Afrikaans', 'isiZulu',
-            'Beginner', 'Advanced', 'Professional', 'Personal Development',
-            'Entrepreneurship', 'Small Business', 'Freelancing', 'Digital Marketing'
+        existing = {} if self.clear else Tag.objects.filter(name__in=SAMPLE_TAG_NAMES).in_bulk(field_name='name')
+        new_tags = [
+            Tag(name=tag_name, slug=slugify(tag_name))
+            for tag_name in SAMPLE_TAG_NAMES
+            if tag_name not in existing
         ]
+        Tag.objects.bulk_create(new_tags, batch_size=settings.SAMPLE_DATA_BATCH_SIZE)
         
-        tags = []
-        for tag_name in tag_names:
-            tag, created = Tag.objects.get_or_create(
-                name=tag_name,
-                defaults={'slug': tag_name.lower().replace(' ', '-')}
-            )
-            tags.append(tag)
-            if created:
-                self.stdout.write(f'Created tag: {tag.name}')
-        
-        return tags
+        self.stdout.write(f'Created {len(new_tags)} tags')
+        return list(existing.values()) + new_tags
 
     def create_creators(self):
         """Create sample creator accounts."""
-        creators_data = [
-            {
-                'email': 'thabo@example.com',
-                'first_name': 'Thabo',
-                'last_name': 'Mthembu',
-                'store_name': 'Thabo Design Studio',
-                'store_description': 'Graphic designer from Johannesburg specializing in branding and digital art.'
-            },
-            {
-                'email': 'sarah@example.com',
-                'first_name': 'Sarah',
-                'last_name': 'van der Merwe',
-                'store_name': 'Cape Learning Hub',
-                'store_description': 'Educational content creator and online course instructor from Cape Town.'
-            },
-            {
-                'email': 'amahle@example.com',
-                'first_name': 'Amahle',
-                'last_name': 'Ndlovu',
-                'store_name': 'Code Mastery KZN',
-                'store_description': 'Software developer and coding instructor from Durban.'
-            },
-            {
-                'email': 'pieter@example.com',
-                'first_name': 'Pieter',
-                'last_name': 'Botha',
-                'store_name': 'Wild SA Photography',
-                'store_description': 'Wildlife and landscape photographer specializing in South African scenes.'
-            },
-            {
-                'email': 'nomsa@example.com',
-                'first_name': 'Nomsa',
-                'last_name': 'Zulu',
-                'store_name': 'Business Growth SA',
-                'store_description': 'Business consultant and entrepreneur helping SA SMEs grow.'
-            }
-        ]
+        emails = [creator_data['email'] for creator_data in SAMPLE_CREATORS]
+        existing = {} if self.clear else User.objects.filter(email__in=emails).in_bulk(field_name='email')
+        # Every demo creator shares a password, so run the hasher once
+        demo_password = make_password('Demo123!')
         
-        creators = []
-        for creator_data in creators_data:
-            user, created = User.objects.get_or_create(
-                email=creator_data['email'],
-                defaults={
-                    'first_name': creator_data['first_name'],
-                    'last_name': creator_data['last_name'],
-                    'role': 'creator',
-                    'is_active': True
-                }
+        new_creators = [
+            (
+                User(
+                    email=creator_data['email'],
+                    first_name=creator_data['first_name'],
+                    last_name=creator_data['last_name'],
+                    role='creator',
+                    is_active=True,
+                    password=demo_password
+                ),
+                creator_data
             )
-            
-            if created:
-                user.set_password('Demo123!')
-                user.save()
-                
-                # Create user profile
-                profile, _ = UserProfile.objects.get_or_create(
+            for creator_data in SAMPLE_CREATORS
+            if creator_data['email'] not in existing
+        ]
+        
+        # Users, then their profiles, one insert each
+        User.objects.bulk_create([user for user, _ in new_creators], batch_size=settings.SAMPLE_DATA_BATCH_SIZE)
+        UserProfile.objects.bulk_create(
+            [
+                UserProfile(
                     user=user,
-                    defaults={
-                        'city': random.choice(['Johannesburg', 'Cape Town', 'Durban', 'Pretoria', 'Port Elizabeth']),
-                        'province': random.choice(['GP', 'WC', 'KZN', 'EC']),
-                        'country': 'South Africa'
-                    }
+                    city=self.rng.choice(['Johannesburg', 'Cape Town', 'Durban', 'Pretoria', 'Port Elizabeth']),
+                    province=self.rng.choice(['GP', 'WC', 'KZN', 'EC']),
+                    country='South Africa'
                 )
-                
-                # Create creator profile
-                creator_profile, _ = CreatorProfile.objects.get_or_create(
+                for user, _ in new_creators
+            ],
+            batch_size=settings.SAMPLE_DATA_BATCH_SIZE
+        )
+        CreatorProfile.objects.bulk_create(
+            [
+                CreatorProfile(
                     user=user,
-                    defaults={
-                        'store_name': creator_data['store_name'],
-                        'store_slug': creator_data['store_name'].lower().replace(' ', '-'),
-                        'store_description': creator_data['store_description'],
-                        'status': 'active',
-                    }
+                    store_name=creator_data['store_name'],
+                    store_slug=slugify(creator_data['store_name']),
+                    store_description=creator_data['store_description'],
+                    status='active'
                 )
-                
-                self.stdout.write(f'Created creator: {user.get_full_name()}')
-            
-            creators.append(user)
+                for user, creator_data in new_creators
+            ],
+            batch_size=settings.SAMPLE_DATA_BATCH_SIZE
+        )
         
-        return creators
+        for user, _ in new_creators:
+            existing[user.email] = user
+        self.stdout.write(f'Created {len(new_creators)} creators')
+        
+        return [existing[email] for email in emails]
 
-    def create_products(self, categories, tags, creators):
-        """Create sample products."""
-        products_data = [
-            # Digital Downloads
-            {
-                'name': 'South African Business Card Templates',
-                'description': 'Professional business card templates designed for South African businesses. Includes 20 unique designs with local themes and contact formats.',
-                'short_description': 'Professional SA business card templates with local themes.',
-                'price': Decimal('149.00'),
-                'category': 'digital-downloads',
-                'product_type': 'digital_download',
-                'tags': ['Design', 'Business', 'South Africa', 'Professional']
-            },
-            {
-                'name': 'Heritage Day Marketing Kit',
-                'description': 'Complete marketing kit for Heritage Day celebrations. Includes social media templates, poster designs, and promotional materials.',
-                'short_description': 'Complete Heritage Day marketing templates and designs.',
-                'price': Decimal('299.00'),
-                'category': 'digital-downloads',
-                'product_type': 'digital_download',
-                'tags': ['Marketing', 'Design', 'South Africa', 'Social Media']
-            },
-            {
-                'name': 'Ubuntu Philosophy Presentation Template',
-                'description': 'Beautiful presentation templates incorporating Ubuntu philosophy and African design elements. Perfect for corporate and educational use.',
-                'short_description': 'Ubuntu-inspired presentation templates with African design.',
-                'price': Decimal('199.00'),
-                'category': 'business-templates',
-                'product_type': 'digital_download',
-                'tags': ['Business', 'Design', 'South Africa', 'Professional']
-            },
-            
-            # Courses
-            {
-                'name': 'Digital Marketing for SA Small Business',
-                'description': 'Complete course on digital marketing strategies specifically for South African small businesses. Covers local SEO, social media, and online advertising.',
-                'short_description': 'Digital marketing course tailored for SA small businesses.',
-                'price': Decimal('1299.00'),
-                'category': 'online-courses',
-                'product_type': 'course',
-                'tags': ['Digital Marketing', 'Small Business', 'South Africa', 'Education']
-            },
-            {
-                'name': 'Python Programming in Afrikaans',
-                'description': 'Learn Python programming with explanations in Afrikaans. Perfect for Afrikaans-speaking developers starting their coding journey.',
-                'short_description': 'Python programming course taught in Afrikaans.',
-                'price': Decimal('899.00'),
-                'category': 'online-courses',
-                'product_type': 'course',
-                'tags': ['Technology', 'Programming', 'Afrikaans', 'Education', 'Beginner']
-            },
-            {
-                'name': 'Photography of South African Wildlife',
-                'description': 'Master wildlife photography techniques with focus on South African animals and landscapes. Includes location guides and equipment recommendations.',
-                'short_description': 'Wildlife photography course for SA animals and landscapes.',
-                'price': Decimal('1599.00'),
-                'category': 'online-courses',
-                'product_type': 'course',
-                'tags': ['Photography', 'South Africa', 'Education', 'Advanced']
-            },
-            
-            # Ebooks
-            {
-                'name': 'Starting a Business in South Africa 2024',
-                'description': 'Comprehensive guide to starting a business in South Africa. Covers legal requirements, tax obligations, and practical tips for entrepreneurs.',
-                'short_description': 'Complete guide to starting a business in SA.',
-                'price': Decimal('249.00'),
-                'category': 'ebooks-guides',
-                'product_type': 'digital_download',
-                'tags': ['Business', 'Entrepreneurship', 'South Africa', 'Legal']
-            },
-            {
-                'name': 'Township Tourism: A Guide for Entrepreneurs',
-                'description': 'How to start and run a successful township tourism business. Includes case studies, marketing strategies, and community engagement tips.',
-                'short_description': 'Guide to starting township tourism businesses.',
-                'price': Decimal('199.00'),
-                'category': 'ebooks-guides',
-                'product_type': 'digital_download',
-                'tags': ['Tourism', 'Entrepreneurship', 'South Africa', 'Small Business']
-            },
-            
-            # Music & Audio
-            {
-                'name': 'Amapiano Loops & Samples Pack',
-                'description': 'High-quality Amapiano loops and samples recorded by professional South African producers. Perfect for music production.',
-                'short_description': 'Professional Amapiano loops and samples for producers.',
-                'price': Decimal('399.00'),
-                'category': 'music-audio',
-                'product_type': 'digital_download',
-                'tags': ['Music', 'South Africa', 'Amapiano', 'Creative']
-            },
-            {
-                'name': 'Traditional African Drums Sample Library',
-                'description': 'Authentic African drum samples recorded live. Includes djembe, talking drums, and other traditional percussion instruments.',
-                'short_description': 'Authentic African drum samples and loops.',
-                'price': Decimal('299.00'),
-                'category': 'music-audio',
-                'product_type': 'digital_download',
-                'tags': ['Music', 'South Africa', 'Traditional', 'Creative']
-            },
-            
-            # Photography
-            {
-                'name': 'Cape Town Stock Photo Collection',
-                'description': '100 high-resolution stock photos of Cape Town landmarks, Table Mountain, and city scenes. Commercial use included.',
-                'short_description': 'High-res Cape Town stock photos for commercial use.',
-                'price': Decimal('499.00'),
-                'category': 'photography',
-                'product_type': 'digital_download',
-                'tags': ['Photography', 'Cape Town', 'South Africa', 'Stock Photos']
-            },
-            {
-                'name': 'Kruger National Park Wildlife Photos',
-                'description': 'Stunning wildlife photography from Kruger National Park. Features the Big 5 and other African animals in their natural habitat.',
-                'short_description': 'Professional Kruger Park wildlife photography collection.',
-                'price': Decimal('699.00'),
-                'category': 'photography',
-                'product_type': 'digital_download',
-                'tags': ['Photography', 'Wildlife', 'South Africa', 'Nature']
-            },
-            
-            # Events
-            {
-                'name': 'Digital Transformation Workshop',
-                'description': 'Live online workshop on digital transformation for South African businesses. Learn practical strategies and tools.',
-                'short_description': 'Live workshop on digital transformation for SA businesses.',
-                'price': Decimal('799.00'),
-                'category': 'events-workshops',
-                'product_type': 'event',
-                'tags': ['Business', 'Technology', 'Digital Transformation', 'Education']
-            },
-            {
-                'name': 'African Design Thinking Masterclass',
-                'description': 'Interactive masterclass on applying African design principles to modern UX/UI design. Includes hands-on exercises.',
-                'short_description': 'Masterclass on African-inspired design thinking.',
-                'price': Decimal('999.00'),
-                'category': 'events-workshops',
-                'product_type': 'event',
-                'tags': ['Design', 'UX/UI', 'South Africa', 'Creative', 'Education']
-            }
-        ]
+    def create_products(self, categories, tags, creators, count=1, use_copy=False):
+        """Create sample products, repeating each template count times."""
+        products_data = SAMPLE_PRODUCTS
         
+        if count > 1:
+            # Number the copies so each (name, creator) pair stays distinct
+            products_data = [
+                {**product_data, 'name': f"{product_data['name']} #{copy}"}
+                for copy in range(1, count + 1)
+                for product_data in products_data
+            ]
+        
+        # Base rows carry their subtype's content type so polymorphic queries resolve them
+        product_ctypes = {
+            'digital_download': ContentType.objects.get_for_model(DigitalDownload, for_concrete_model=False),
+            'course': ContentType.objects.get_for_model(Course, for_concrete_model=False),
+            'event': ContentType.objects.get_for_model(Event, for_concrete_model=False),
+        }
+        existing = set() if self.clear else set(
+            Product.objects.filter(
+                name__in=[product_data['name'] for product_data in products_data]
+            ).values_list('name', 'creator_id')
+        )
+        # Products only need the related ids, not the instances
+        category_ids = {category.slug: category.id for category in categories}
+        tag_ids = {tag.name: tag.id for tag in tags}
+        creator_ids = [creator.id for creator in creators]
+        
+        # Draw the per-product random values up front
+        featured = self.rng.choices([True, False], k=len(products_data))
+        scores = [self.rng.uniform(0.1, 1.0) for _ in products_data]
+        
+        new_products = []
         for i, product_data in enumerate(products_data):
-            creator = creators[i % len(creators)]
-            category = next(cat for cat in categories if cat.slug == product_data['category'])
-            
-            # Create base product
-            product, created = Product.objects.get_or_create(
+            creator_id = creator_ids[i % len(creator_ids)]
+            if (product_data['name'], creator_id) in existing:
+                continue
+            product = Product(
+                polymorphic_ctype=product_ctypes[product_data['product_type']],
                 name=product_data['name'],
-                creator=creator,
-                defaults={
-                    'description': product_data['description'],
-                    'short_description': product_data['short_description'],
-                    'price': product_data['price'],
-                    'category': category,
-                    'product_type': product_data['product_type'],
-                    'status': 'published',
-                    'visibility': 'public',
-                    'is_featured': random.choice([True, False]),
-                    'recommendation_score': random.uniform(0.1, 1.0)
-                }
+                creator_id=creator_id,
+                description=product_data['description'],
+                short_description=product_data['short_description'],
+                price=product_data['price'],
+                category_id=category_ids[product_data['category']],
+                product_type=product_data['product_type'],
+                status='published',
+                visibility='public',
+                is_featured=featured[i],
+                recommendation_score=scores[i]
             )
+            new_products.append((product, product_data))
+        
+        # Create base products and their tag links in two inserts
+        if use_copy and connection.vendor == 'postgresql':
+            self.copy_products([product for product, _ in new_products])
+        else:
+            if use_copy:
+                self.stdout.write(self.style.WARNING('--use-copy needs PostgreSQL; using bulk inserts'))
+            Product.objects.bulk_create([product for product, _ in new_products], batch_size=settings.SAMPLE_DATA_BATCH_SIZE)
+        # Every link points at a product inserted above, so none can conflict
+        ProductTag = Product.tags.through
+        ProductTag.objects.bulk_create(
+            [
+                ProductTag(product_id=product.id, tag_id=tag_ids[tag_name])
+                for product, product_data in new_products
+                for tag_name in dict.fromkeys(product_data['tags'])
+                if tag_name in tag_ids
+            ],
+            batch_size=settings.SAMPLE_DATA_BATCH_SIZE
+        )
+        
+        # Multi-table children can't go through bulk_create, so collect the
+        # subtype rows and insert them per model without re-saving their parents
+        subtypes = {DigitalDownload: [], Course: [], Event: []}
+        for product, product_data in new_products:
+            if product_data['product_type'] == 'digital_download':
+                subtype = DigitalDownload(
+                    product_ptr=product,
+                    file_size_mb=self.rng.uniform(1.0, 100.0),
+                    download_limit=self.rng.choice([None, 3, 5, 10]),
+                    expiry_days=self.rng.choice([None, 30, 90, 365])
+                )
+            elif product_data['product_type'] == 'course':
+                subtype = Course(
+                    product_ptr=product,
+                    duration_hours=self.rng.randint(2, 20),
+                    level=self.rng.choice(['beginner', 'intermediate', 'advanced']),
+                    certificate_enabled=self.rng.choice([True, False])
+                )
+            elif product_data['product_type'] == 'event':
+                subtype = Event(
+                    product_ptr=product,
+                    event_type=self.rng.choice(['virtual', 'hybrid']),
+                    max_attendees=self.rng.choice([None, 50, 100, 200]),
+                    timezone='Africa/Johannesburg'
+                )
+            subtypes[type(subtype)].append(subtype)
             
-            if created:
-                # Add tags
-                product_tags = [tag for tag in tags if tag.name in product_data['tags']]
-                product.tags.set(product_tags)
-                
-                # Create specific product type instance
-                if product_data['product_type'] == 'digital_download':
-                    DigitalDownload.objects.get_or_create(
-                        product_ptr=product,
-                        defaults={
-                            'file_size_mb': random.uniform(1.0, 100.0),
-                            'download_limit': random.choice([None, 3, 5, 10]),
-                            'expiry_days': random.choice([None, 30, 90, 365])
-                        }
-                    )
-                elif product_data['product_type'] == 'course':
-                    Course.objects.get_or_create(
-                        product_ptr=product,
-                        defaults={
-                            'duration_hours': random.uniform(2.0, 20.0),
-                            'skill_level': random.choice(['beginner', 'intermediate', 'advanced']),
-                            'is_certification_provided': random.choice([True, False]),
-                            'language': random.choice(['en', 'af', 'zu'])
-                        }
-                    )
-                elif product_data['product_type'] == 'event':
-                    Event.objects.get_or_create(
-                        product_ptr=product,
-                        defaults={
-                            'event_type': random.choice(['webinar', 'workshop', 'conference']),
-                            'is_live': True,
-                            'max_attendees': random.choice([None, 50, 100, 200]),
-                            'timezone': 'Africa/Johannesburg'
-                        }
-                    )
-                
+            if self.verbosity >= 2:
                 self.stdout.write(f'Created product: {product.name}')
         
-        self.stdout.write(f'Created {len(products_data)} sample products')
+        for model, rows in subtypes.items():
+            self.insert_subtypes(model, rows)
+        
+        self.stdout.write(f'Created {len(new_products)} sample products')
+    
+    def insert_subtypes(self, model, subtypes):
+        """Insert multi-table child rows with one multi-row INSERT per batch."""
+        if not subtypes:
+            return
+        # Only the child table's own columns (product_ptr included), written
+        # as-is like save_base(raw=True); the parent rows already exist
+        fields = [field for field in model._meta.local_concrete_fields if not field.generated]
+        batch_size = min(settings.SAMPLE_DATA_BATCH_SIZE, connection.ops.bulk_batch_size(fields, subtypes))
+        for start in range(0, len(subtypes), batch_size):
+            model._base_manager._insert(subtypes[start:start + batch_size], fields=fields, raw=True)
+
+    def copy_products(self, products):
+        """Load base product rows in one COPY FROM STDIN stream."""
+        # Generated columns are computed by the database and can't be copied in
+        fields = [field for field in Product._meta.local_concrete_fields if not field.generated]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for product in products:
+            product.pre_save_polymorphic()
+            row = []
+            for field in fields:
+                # pre_save fills auto_now_add timestamps like a regular insert
+                value = field.pre_save(product, True)
+                if value is None:
+                    row.append('\\N')
+                elif isinstance(field, models.JSONField):
+                    row.append(json.dumps(value))
+                else:
+                    row.append(value)
+            writer.writerow(row)
+        buffer.seek(0)
+
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Product._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
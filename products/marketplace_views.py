@@ -5,10 +5,17 @@ Inspired by Whop's marketplace with South African focus.
 
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
-from django.db.models import Q, F, Count, Sum, Avg, Case, When, Value
+from django.conf import settings
+from django.db import connections
+from django.db.models import (
+    Q, F, Count, Sum, Avg, Case, When, Value, QuerySet, OuterRef, Subquery,
+    ExpressionWrapper, FloatField, Aggregate, TextField
+)
+from django.db.models.functions import Cast, Coalesce, Concat
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
@@ -18,19 +25,51 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 import json
+import logging
+import os
 import random
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+import threading
+import time
+import uuid
 
 from .models import Product, Category, Tag, ProductAnalytics, ProductReview
+from .interactions import buffer_product_view, get_interactions, record_interaction
+from .search import search_products, suggest_names
 from .serializers import (
     ProductListSerializer, CategorySerializer, 
     MarketplaceProductSerializer, TrendingProductSerializer
 )
 from accounts.models import UserProfile
+from orders.models import OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+DISCOVERY_SECTIONS_CACHE_KEY = 'marketplace:discovery:v1'
+DISCOVERY_RANK_BATCH_SIZE = 500
+POPULAR_PRODUCTS_CACHE_KEY = 'marketplace:popular_products:v1'
+POPULAR_PRODUCTS_LIMIT = 100
+
+# marketplace_api sort options: (sort value expression, descending)
+MARKETPLACE_SORTS = {
+    'price_low': (F('price'), False),
+    'price_high': (F('price'), True),
+    'newest': (Coalesce('published_at', 'created_at'), True),
+    'rating': (F('rating_average'), True),
+    'sales': (F('last_24h_sales'), True),
+    'trending': (F('trending_score'), True),
+}
+
+# Fitted TF-IDF index, loaded from RECOMMENDATION_INDEX_PATH once per process
+# and reloaded whenever the file's mtime (its version) changes
+_tfidf_index = None
+_tfidf_index_version = None
+_tfidf_index_lock = threading.Lock()
 
 
 class MarketplaceDiscoveryView(TemplateView):
@@ -40,19 +79,44 @@ class MarketplaceDiscoveryView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get curated sections
-        context.update({
-            'featured_products': self.get_featured_products(),
-            'trending_products': self.get_trending_products(),
-            'new_arrivals': self.get_new_arrivals(),
-            'top_earners': self.get_top_earners(),
-            'categories': self.get_popular_categories(),
-            'recommended_products': self.get_recommendations(),
-            'marketplace_stats': self.get_marketplace_stats(),
-        })
+        # Get curated sections, shared by every visitor for a minute
+        sections = cache.get(DISCOVERY_SECTIONS_CACHE_KEY)
+        if sections is None:
+            sections = self.get_discovery_sections()
+            cache.set(DISCOVERY_SECTIONS_CACHE_KEY, sections, 60)
+        
+        context.update(sections)
+        context['recommended_products'] = self.get_recommendations()
         
         return context
     
+    def get_discovery_sections(self):
+        """Run the independent section queries concurrently instead of back to back."""
+        loaders = {
+            'featured_products': self.get_featured_products,
+            'trending_products': self.get_trending_products,
+            'new_arrivals': self.get_new_arrivals,
+            'top_earners': self.get_top_earners,
+            'categories': self.get_popular_categories,
+            'marketplace_stats': self.get_marketplace_stats,
+        }
+        with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+            futures = {
+                name: executor.submit(self.load_section, loader)
+                for name, loader in loaders.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+    
+    @staticmethod
+    def load_section(loader):
+        """Evaluate one section in a worker thread and release its DB connection."""
+        try:
+            section = loader()
+            # Querysets are lazy, so run them here rather than in the template
+            return list(section) if isinstance(section, QuerySet) else section
+        finally:
+            connections.close_all()
+    
     def get_featured_products(self):
         """Get marketplace promoted/featured products."""
         return Product.objects.filter(
@@ -99,12 +163,17 @@ class MarketplaceDiscoveryView(TemplateView):
     
     def get_popular_categories(self):
         """Get categories with most active products."""
+        # Aggregate published products per category in correlated subqueries
+        # so the counts never multiply across joined rows
+        published = Product.objects.filter(
+            category=OuterRef('pk'),
+            status=Product.ProductStatus.PUBLISHED
+        ).order_by().values('category')
         return Category.objects.filter(
-            is_active=True,
-            products__status=Product.ProductStatus.PUBLISHED
+            is_active=True
         ).annotate(
-            products_count=Count('products'),
-            total_sales=Sum('products__last_24h_sales')
+            products_count=Coalesce(Subquery(published.annotate(count=Count('*')).values('count')), 0),
+            total_sales=Coalesce(Subquery(published.annotate(sales=Sum('last_24h_sales')).values('sales')), 0)
         ).filter(products_count__gt=0).order_by('-total_sales', '-products_count')[:8]
     
     def get_recommendations(self):
@@ -117,49 +186,66 @@ class MarketplaceDiscoveryView(TemplateView):
     def get_personalized_recommendations(self):
         """Get personalized recommendations for authenticated users."""
         user = self.request.user
-        cache_key = f"recommendations_user_{user.id}"
+        cache_key = f"recs:user:{user.id}:v1"
+        stale_key = f"recs_stale:user:{user.id}:v1"
         recommendations = cache.get(cache_key)
         
         if recommendations is None:
-            # Get user's purchase history and preferences
-            user_products = Product.objects.filter(
-                order_items__order__user=user
-            ).values_list('id', flat=True)
-            
-            if user_products:
-                # Use collaborative filtering
-                recommendations = self.collaborative_filtering(user, user_products)
-            else:
-                # Use content-based filtering based on profile
-                recommendations = self.content_based_filtering(user)
+            # Only one request recomputes; concurrent ones serve the stale copy
+            lock_key = f"lock:recs:user:{user.id}"
+            if not cache.add(lock_key, 1, 30):
+                recommendations = cache.get(stale_key)
+                return recommendations if recommendations is not None else self.get_popular_products()
             
-            cache.set(cache_key, recommendations, 1800)  # Cache for 30 minutes
+            try:
+                # Get user's purchase history and preferences
+                user_products = Product.objects.filter(
+                    order_items__order__buyer=user
+                ).values_list('id', flat=True)
+                
+                if user_products:
+                    # Use collaborative filtering
+                    recommendations = self.collaborative_filtering(user, user_products)
+                else:
+                    # Use content-based filtering based on profile
+                    recommendations = self.content_based_filtering(user)
+                
+                recommendations = list(recommendations[:8])
+                cache.set(cache_key, recommendations, 1800)  # Cache for 30 minutes
+                cache.set(stale_key, recommendations, 7200)  # Stale copy for lock waiters
+            finally:
+                cache.delete(lock_key)
         
-        return recommendations[:8]
+        return recommendations
     
     def collaborative_filtering(self, user, user_products):
-        """Simple collaborative filtering algorithm."""
-        # Find similar users based on purchase history
-        similar_users = Product.objects.filter(
-            order_items__order__user__in=Product.objects.filter(
-                id__in=user_products
-            ).values_list('order_items__order__user', flat=True)
-        ).exclude(
-            order_items__order__user=user
-        ).values_list('order_items__order__user', flat=True).distinct()
+        """Collaborative filtering weighted by how much other buyers' purchases overlap."""
+        # Top 50 other buyers by number of shared products
+        overlaps = dict(
+            OrderItem.objects.filter(
+                product__in=user_products,
+                order__buyer__isnull=False
+            ).exclude(
+                order__buyer=user
+            ).values('order__buyer').annotate(
+                overlap=Count('product', distinct=True)
+            ).order_by('-overlap').values_list('order__buyer', 'overlap')[:50]
+        )
         
-        # Get products purchased by similar users
-        recommended_products = Product.objects.filter(
-            order_items__order__user__in=similar_users,
-            status=Product.ProductStatus.PUBLISHED
+        # Score their other purchases by the overlap of each buyer who bought them
+        scores = Counter()
+        for buyer_id, product_id in OrderItem.objects.filter(
+            order__buyer__in=list(overlaps)
         ).exclude(
-            id__in=user_products
-        ).annotate(
-            similarity_score=Count('order_items'),
-            avg_rating=Avg('reviews__rating')
-        ).order_by('-similarity_score', '-avg_rating')
+            product__in=user_products
+        ).values_list('order__buyer', 'product').distinct():
+            scores[product_id] += overlaps[buyer_id]
         
-        return recommended_products
+        recommended_ids = [product_id for product_id, _ in scores.most_common(20)]
+        products = Product.objects.filter(
+            status=Product.ProductStatus.PUBLISHED
+        ).in_bulk(recommended_ids)
+        return [products[product_id] for product_id in recommended_ids if product_id in products]
     
     def content_based_filtering(self, user):
         """Content-based filtering using user profile and preferences."""
@@ -184,17 +270,22 @@ class MarketplaceDiscoveryView(TemplateView):
             ).order_by('-relevance_score', '-avg_rating', '-trending_score')
             
             return recommendations
-        except:
+        except (AttributeError, UserProfile.DoesNotExist):
+            # No profile to personalize from
             return self.get_popular_products()
     
     def get_popular_products(self):
         """Fallback: get generally popular products."""
-        return Product.objects.filter(
+        # Ranked ids are precomputed by refresh_popular_products
+        product_ids = cache.get(POPULAR_PRODUCTS_CACHE_KEY)
+        if product_ids is None:
+            product_ids = refresh_popular_products()
+        
+        product_ids = product_ids[:8]
+        products = Product.objects.filter(
             status=Product.ProductStatus.PUBLISHED
-        ).annotate(
-            avg_rating=Avg('reviews__rating'),
-            total_sales=Count('order_items')
-        ).order_by('-total_sales', '-avg_rating')[:8]
+        ).in_bulk(product_ids)
+        return [products[product_id] for product_id in product_ids if product_id in products]
     
     def get_marketplace_stats(self):
         """Get marketplace statistics."""
@@ -202,13 +293,13 @@ class MarketplaceDiscoveryView(TemplateView):
         stats = cache.get(cache_key)
         
         if stats is None:
-            total_products = Product.objects.filter(
+            # Both counts in one query; COUNT(DISTINCT creator_id) avoids a DISTINCT subquery
+            product_stats = Product.objects.filter(
                 status=Product.ProductStatus.PUBLISHED
-            ).count()
-            
-            total_creators = Product.objects.filter(
-                status=Product.ProductStatus.PUBLISHED
-            ).values('creator').distinct().count()
+            ).aggregate(
+                total_products=Count('id'),
+                total_creators=Count('creator', distinct=True)
+            )
             
             today = timezone.now().date()
             today_sales = Product.objects.filter(
@@ -219,8 +310,8 @@ class MarketplaceDiscoveryView(TemplateView):
             )
             
             stats = {
-                'total_products': total_products,
-                'total_creators': total_creators,
+                'total_products': product_stats['total_products'],
+                'total_creators': product_stats['total_creators'],
                 'today_sales': today_sales.get('total_sales') or 0,
                 'today_revenue': today_sales.get('total_revenue') or 0,
                 'currencies_supported': ['ZAR', 'USD', 'EUR'],
@@ -236,7 +327,7 @@ class MarketplaceDiscoveryView(TemplateView):
 @permission_classes([AllowAny])
 def marketplace_api(request):
     """API endpoint for marketplace data with infinite scrolling."""
-    page = int(request.GET.get('page', 1))
+    cursor = request.GET.get('cursor')
     page_size = int(request.GET.get('page_size', 20))
     category = request.GET.get('category')
     search = request.GET.get('search')
@@ -246,18 +337,18 @@ def marketplace_api(request):
     # Base queryset
     queryset = Product.objects.filter(
         status=Product.ProductStatus.PUBLISHED
-    ).select_related('creator', 'category').prefetch_related('tags')
+    ).with_subclasses().select_related('creator', 'category').prefetch_related('tags')
     
     # Apply filters
     if category and category != 'all':
         queryset = queryset.filter(category__slug=category)
     
     if search:
-        queryset = queryset.filter(
-            Q(title__icontains=search) |
+        queryset = search_products(queryset, search, (
+            Q(name__icontains=search) |
             Q(description__icontains=search) |
             Q(tags__name__icontains=search)
-        ).distinct()
+        ))
     
     if filter_type == 'featured':
         queryset = queryset.filter(is_marketplace_promoted=True)
@@ -268,42 +359,64 @@ def marketplace_api(request):
     elif filter_type == 'trending':
         queryset = queryset.filter(trending_score__gt=0)
     
-    # Apply sorting
-    if sort_by == 'price_low':
-        queryset = queryset.order_by('price')
-    elif sort_by == 'price_high':
-        queryset = queryset.order_by('-price')
-    elif sort_by == 'newest':
-        queryset = queryset.order_by('-published_at')
-    elif sort_by == 'rating':
-        queryset = queryset.annotate(
-            avg_rating=Avg('reviews__rating')
-        ).order_by('-avg_rating')
-    elif sort_by == 'sales':
-        queryset = queryset.order_by('-last_24h_sales')
-    else:  # trending (default)
-        queryset = queryset.order_by('-trending_score', '-discovery_rank')
+    # Apply sorting, with id as the tie-breaker so every row has a unique position
+    sort_value, descending = MARKETPLACE_SORTS.get(sort_by, MARKETPLACE_SORTS['trending'])
+    direction = '-' if descending else ''
+    queryset = queryset.annotate(sort_value=sort_value).order_by(
+        f'{direction}sort_value', f'{direction}id'
+    )
     
-    # Paginate results
-    paginator = Paginator(queryset, page_size)
-    products_page = paginator.get_page(page)
+    # Keyset pagination: seek past the last row of the previous page instead of
+    # OFFSET, and skip COUNT(*) entirely
+    if cursor:
+        try:
+            last_value, last_id = decode_cursor(
+                cursor, queryset.query.annotations['sort_value'].output_field
+            )
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'sort_value__{lookup}': last_value}) |
+            Q(sort_value=last_value, **{f'id__{lookup}': last_id})
+        )
+    
+    products = list(queryset[:page_size + 1])
+    has_next = len(products) > page_size
+    products = products[:page_size]
     
     # Serialize data
     serializer = MarketplaceProductSerializer(
-        products_page.object_list, 
+        products, 
         many=True, 
         context={'request': request}
     )
     
     return Response({
         'results': serializer.data,
-        'has_next': products_page.has_next(),
-        'page': page,
-        'total_pages': paginator.num_pages,
-        'total_count': paginator.count
+        'has_next': has_next,
+        'next_cursor': encode_cursor([products[-1].sort_value, str(products[-1].id)]) if has_next else None
     })
 
 
+def encode_cursor(position):
+    """Encode a (sort value, id) keyset position as an opaque URL-safe cursor."""
+    # str() keeps full datetime precision (DjangoJSONEncoder truncates to milliseconds)
+    return urlsafe_b64encode(json.dumps(position, default=str).encode()).decode()
+
+
+def decode_cursor(cursor, sort_field):
+    """Decode a cursor from encode_cursor into (sort value, id); raises ValueError if it is invalid."""
+    try:
+        position = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(position, list) or len(position) != 2 or position[0] is None:
+            raise ValueError(cursor)
+        # Coerce both parts here so a tampered cursor never reaches the query
+        return sort_field.to_python(position[0]), uuid.UUID(str(position[1]))
+    except (ValueError, TypeError, ValidationError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def trending_products_api(request):
@@ -344,10 +457,7 @@ def track_product_interaction(request):
         
         product = get_object_or_404(Product, id=product_id)
         
-        # Track interaction (implement with Celery for production)
-        cache_key = f"user_interactions_{request.user.id}"
-        interactions = cache.get(cache_key, [])
-        
+        # Track interaction (last 100 kept per user)
         interaction = {
             'product_id': product_id,
             'type': interaction_type,
@@ -356,13 +466,11 @@ def track_product_interaction(request):
             'category': product.category.slug if product.category else None
         }
         
-        interactions.append(interaction)
-        cache.set(cache_key, interactions[-100:], 86400)  # Keep last 100 interactions
+        record_interaction(request.user.id, interaction)
         
-        # Update product analytics
+        # Update product analytics (buffered, flushed by flush_view_counts)
         if interaction_type == 'view':
-            product.view_count = F('view_count') + 1
-            product.save(update_fields=['view_count'])
+            buffer_product_view(product.pk)
         
         return Response({'status': 'tracked'})
     
@@ -381,8 +489,7 @@ def personalized_recommendations(request):
     limit = int(request.GET.get('limit', 10))
     
     # Get user's interaction history
-    cache_key = f"user_interactions_{user.id}"
-    interactions = cache.get(cache_key, [])
+    interactions = get_interactions(user.id)
     
     if not interactions:
         # Return popular products for new users
@@ -410,77 +517,114 @@ def personalized_recommendations(request):
 
 
 def get_ml_recommendations(user, interactions, limit=10):
-    """Get ML-powered recommendations using scikit-learn."""
+    """Get ML-powered recommendations from the prebuilt TF-IDF index."""
+    import numpy as np
+    
+    started = time.perf_counter()
     try:
-        # Get all products for analysis
-        products = Product.objects.filter(
-            status=Product.ProductStatus.PUBLISHED
-        ).select_related('category').prefetch_related('tags')
-        
-        if not products:
-            return []
-        
-        # Create feature vectors for products
-        product_features = []
-        product_objects = []
-        
-        for product in products:
-            # Create text representation of product
-            tags = ' '.join([tag.name for tag in product.tags.all()])
-            category = product.category.name if product.category else ''
-            text_features = f"{product.title} {product.description} {tags} {category}"
-            
-            product_features.append(text_features)
-            product_objects.append(product)
+        index = get_tfidf_index()
+        if index is None:
+            # No index published yet; build_product_tfidf_index runs on a schedule
+            return Product.objects.filter(
+                status=Product.ProductStatus.PUBLISHED
+            ).order_by('-trending_score')[:limit]
         
-        # Use TF-IDF to create feature vectors
-        vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        feature_matrix = vectorizer.fit_transform(product_features)
+        feature_matrix, product_ids, id_to_row = index
         
         # Get user's interaction-based preferences
-        interacted_products = [i['product_id'] for i in interactions]
-        user_preferences = []
+        interacted_products = {str(i['product_id']) for i in interactions}
+        user_rows = [id_to_row[pid] for pid in interacted_products if pid in id_to_row]
         
-        for product_id in set(interacted_products):
-            try:
-                product = Product.objects.get(id=product_id)
-                product_index = next(
-                    i for i, p in enumerate(product_objects) 
-                    if p.id == product.id
-                )
-                user_preferences.append(feature_matrix[product_index].toarray()[0])
-            except (Product.DoesNotExist, StopIteration):
-                continue
-        
-        if not user_preferences:
+        if not user_rows:
             return Product.objects.filter(
                 status=Product.ProductStatus.PUBLISHED
             ).order_by('-trending_score')[:limit]
         
-        # Calculate average user preference vector
-        user_vector = np.mean(user_preferences, axis=0).reshape(1, -1)
-        
-        # Calculate similarity scores
-        similarity_scores = cosine_similarity(user_vector, feature_matrix)[0]
+        # Average the interacted rows and score every product with one sparse mat-vec.
+        # Index rows are already unit length, so normalizing the user vector once
+        # makes the scores cosine similarities without renormalizing the matrix
+        user_vector = np.asarray(feature_matrix[user_rows].mean(axis=0)).ravel()
+        user_norm = np.linalg.norm(user_vector)
+        if user_norm:
+            user_vector /= user_norm
+        similarity_scores = feature_matrix @ user_vector
         
-        # Get top recommendations (excluding already interacted products)
-        product_scores = list(zip(product_objects, similarity_scores))
-        product_scores.sort(key=lambda x: x[1], reverse=True)
+        # Get top recommendations (excluding already interacted products).
+        # Only the best limit + len(user_rows) rows can make the cut, so
+        # partition those out in O(N) and sort just that slice
+        top_k = min(limit + len(user_rows), len(similarity_scores))
+        top_rows = np.argpartition(-similarity_scores, top_k - 1)[:top_k]
+        top_rows = top_rows[np.argsort(-similarity_scores[top_rows])]
         
-        recommendations = []
-        for product, score in product_scores:
-            if product.id not in interacted_products and len(recommendations) < limit:
-                recommendations.append(product)
+        recommendation_ids = []
+        for row in top_rows:
+            if product_ids[row] not in interacted_products:
+                recommendation_ids.append(product_ids[row])
+                if len(recommendation_ids) == limit:
+                    break
         
-        return recommendations
-    
-    except Exception as e:
-        # Fallback to simple recommendations
+        products = {
+            str(pk): product
+            for pk, product in Product.objects.filter(
+                status=Product.ProductStatus.PUBLISHED
+            ).in_bulk(recommendation_ids).items()
+        }
+        return [products[pid] for pid in recommendation_ids if pid in products]
+    
+    except (OSError, EOFError, ValueError, MemoryError):
+        # Unreadable index or a failed scoring pass; log it so the wasted
+        # ML time before the fallback stays visible
+        logger.exception(
+            "ML recommendations fell back to trending after %.0f ms",
+            (time.perf_counter() - started) * 1000
+        )
         return Product.objects.filter(
             status=Product.ProductStatus.PUBLISHED
         ).order_by('-trending_score')[:limit]
 
 
+class SpaceJoin(Aggregate):
+    """Join strings with spaces: STRING_AGG on PostgreSQL, GROUP_CONCAT on SQLite."""
+    function = 'STRING_AGG'
+    template = "%(function)s(%(expressions)s, ' ')"
+    output_field = TextField()
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='GROUP_CONCAT', **extra_context)
+
+
+def get_tfidf_index():
+    """Return the (matrix, product_ids, id_to_row) index, loading it once per process."""
+    import joblib
+    
+    global _tfidf_index, _tfidf_index_version
+    
+    # The file itself is the published version, so web processes see a rebuild
+    # from the Celery worker whatever cache backend is configured
+    version = tfidf_index_version()
+    if _tfidf_index is not None and version == _tfidf_index_version:
+        return _tfidf_index
+    
+    with _tfidf_index_lock:
+        version = tfidf_index_version()
+        if version is None:
+            # Nothing published yet; fitting only happens in build_product_tfidf_index
+            return None
+        if _tfidf_index is None or version != _tfidf_index_version:
+            _tfidf_index = joblib.load(settings.RECOMMENDATION_INDEX_PATH)
+            _tfidf_index_version = version
+    
+    return _tfidf_index
+
+
+def tfidf_index_version():
+    """Return the mtime of the published TF-IDF index file, or None if there is none."""
+    try:
+        return os.stat(settings.RECOMMENDATION_INDEX_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def search_suggestions(request):
@@ -490,27 +634,13 @@ def search_suggestions(request):
     if len(query) < 2:
         return Response({'suggestions': []})
     
-    # Get product suggestions
-    product_suggestions = Product.objects.filter(
-        status=Product.ProductStatus.PUBLISHED,
-        title__icontains=query
-    ).values_list('title', flat=True)[:5]
-    
-    # Get category suggestions
-    category_suggestions = Category.objects.filter(
-        is_active=True,
-        name__icontains=query
-    ).values_list('name', flat=True)[:3]
-    
-    # Get tag suggestions
-    tag_suggestions = Tag.objects.filter(
-        name__icontains=query
-    ).values_list('name', flat=True)[:3]
-    
+    # Get product, category and tag suggestions (trigram index probes on PostgreSQL)
     suggestions = {
-        'products': list(product_suggestions),
-        'categories': list(category_suggestions),
-        'tags': list(tag_suggestions)
+        'products': suggest_names(
+            Product.objects.non_polymorphic().filter(status=Product.ProductStatus.PUBLISHED), query, 5
+        ),
+        'categories': suggest_names(Category.objects.filter(is_active=True), query, 3),
+        'tags': suggest_names(Tag.objects.all(), query, 3)
     }
     
     return Response({'suggestions': suggestions})
@@ -527,29 +657,28 @@ def marketplace_stats_api(request):
         # Calculate real-time stats
         today = timezone.now().date()
         
+        # One conditional aggregate per table instead of a query per figure
+        product_stats = Product.objects.aggregate(
+            total_products=Count('id', filter=Q(status=Product.ProductStatus.PUBLISHED)),
+            active_creators=Count('creator', distinct=True, filter=Q(status=Product.ProductStatus.PUBLISHED)),
+            trending_count=Count('id', filter=Q(trending_score__gt=0)),
+            featured_count=Count('id', filter=Q(is_marketplace_promoted=True))
+        )
+        review_stats = ProductReview.objects.aggregate(
+            average_rating=Avg('rating'),
+            total_reviews=Count('id')
+        )
+        
         stats = {
-            'total_products': Product.objects.filter(
-                status=Product.ProductStatus.PUBLISHED
-            ).count(),
-            'active_creators': Product.objects.filter(
-                status=Product.ProductStatus.PUBLISHED
-            ).values('creator').distinct().count(),
+            **product_stats,
             'today_sales': ProductAnalytics.objects.filter(
                 date=today
             ).aggregate(Sum('purchases'))['purchases__sum'] or 0,
-            'trending_count': Product.objects.filter(
-                trending_score__gt=0
-            ).count(),
-            'featured_count': Product.objects.filter(
-                is_marketplace_promoted=True
-            ).count(),
             'categories_count': Category.objects.filter(
                 is_active=True
             ).count(),
-            'average_rating': ProductReview.objects.aggregate(
-                Avg('rating')
-            )['rating__avg'] or 0,
-            'total_reviews': ProductReview.objects.count()
+            'average_rating': review_stats['average_rating'] or 0,
+            'total_reviews': review_stats['total_reviews']
         }
         
         cache.set(cache_key, stats, 300)  # Cache for 5 minutes
@@ -562,39 +691,37 @@ def update_trending_scores():
     """Update trending scores for all products (run as Celery task)."""
     from django.db import transaction
     
+    today = timezone.now().date()
+    recent_analytics = ProductAnalytics.objects.filter(
+        product=OuterRef('pk'),
+        date__gte=today - timedelta(days=7)
+    ).order_by().values('product')
+    today_analytics = ProductAnalytics.objects.filter(
+        product=OuterRef('pk'),
+        date=today
+    ).order_by().values('product')
+    
+    def recent_total(field):
+        return Coalesce(
+            Subquery(recent_analytics.annotate(total=Cast(Sum(field), FloatField())).values('total')),
+            0.0
+        )
+    
     with transaction.atomic():
-        # Calculate trending scores based on recent activity
-        for product in Product.objects.filter(status=Product.ProductStatus.PUBLISHED):
-            # Get recent analytics
-            recent_analytics = ProductAnalytics.objects.filter(
-                product=product,
-                date__gte=timezone.now().date() - timedelta(days=7)
-            ).aggregate(
-                total_views=Sum('views'),
-                total_purchases=Sum('purchases'),
-                total_revenue=Sum('revenue')
-            )
-            
-            views = recent_analytics['total_views'] or 0
-            purchases = recent_analytics['total_purchases'] or 0
-            revenue = float(recent_analytics['total_revenue'] or 0)
-            
-            # Calculate trending score (weighted formula)
-            trending_score = (
-                views * 0.3 +
-                purchases * 2.0 +
-                revenue * 0.01 +
-                product.rating_average * 5.0
+        # Calculate trending scores (weighted formula) for every product in one UPDATE
+        Product.objects.filter(status=Product.ProductStatus.PUBLISHED).update(
+            trending_score=ExpressionWrapper(
+                recent_total('views') * 0.3 +
+                recent_total('purchases') * 2.0 +
+                recent_total('revenue') * 0.01 +
+                Cast('rating_average', FloatField()) * 5.0,
+                output_field=FloatField()
+            ),
+            last_24h_sales=Coalesce(
+                Subquery(today_analytics.annotate(total=Sum('purchases')).values('total')),
+                0
             )
-            
-            # Update product
-            product.trending_score = trending_score
-            product.last_24h_sales = ProductAnalytics.objects.filter(
-                product=product,
-                date=timezone.now().date()
-            ).aggregate(Sum('purchases'))['purchases__sum'] or 0
-            
-            product.save(update_fields=['trending_score', 'last_24h_sales'])
+        )
 
 
 def update_discovery_ranks():
@@ -602,13 +729,106 @@ def update_discovery_ranks():
     from django.db import transaction
     
     with transaction.atomic():
-        # Get promoted products and rank them
-        promoted_products = Product.objects.filter(
+        # Get promoted products and rank them, streaming ids in chunks and
+        # writing the ranks back in batched UPDATEs
+        promoted_products = Product.objects.non_polymorphic().filter(
             is_marketplace_promoted=True,
             marketplace_promotion_start__lte=timezone.now(),
             marketplace_promotion_end__gte=timezone.now()
-        ).order_by('-trending_score', '-rating_average', '-view_count')
+        ).order_by('-trending_score', '-rating_average', '-view_count').only('id')
         
-        for index, product in enumerate(promoted_products):
+        batch = []
+        for index, product in enumerate(promoted_products.iterator(chunk_size=DISCOVERY_RANK_BATCH_SIZE)):
             product.discovery_rank = index + 1
-            product.save(update_fields=['discovery_rank'])
+            batch.append(product)
+            if len(batch) == DISCOVERY_RANK_BATCH_SIZE:
+                Product.objects.bulk_update(batch, ['discovery_rank'])
+                batch.clear()
+        Product.objects.bulk_update(batch, ['discovery_rank'])
+
+
+def refresh_popular_products():
+    """Rank the most popular published products and cache their ids (run as Celery task)."""
+    # Per-product subquery aggregates, so sales and reviews never multiply each other
+    sales = OrderItem.objects.filter(
+        product=OuterRef('pk')
+    ).order_by().values('product').annotate(total=Count('id')).values('total')
+    ratings = ProductReview.objects.filter(
+        product=OuterRef('pk')
+    ).order_by().values('product').annotate(average=Avg('rating')).values('average')
+    
+    product_ids = list(
+        Product.objects.non_polymorphic().filter(
+            status=Product.ProductStatus.PUBLISHED
+        ).annotate(
+            total_sales=Coalesce(Subquery(sales), 0),
+            avg_rating=Subquery(ratings)
+        ).order_by(
+            '-total_sales', F('avg_rating').desc(nulls_last=True)
+        ).values_list('id', flat=True)[:POPULAR_PRODUCTS_LIMIT]
+    )
+    
+    # Outlives the 10-minute refresh so visitors never hit a cold cache
+    cache.set(POPULAR_PRODUCTS_CACHE_KEY, product_ids, 1200)
+    return product_ids
+
+
+def build_tfidf_index():
+    """Fit the product TF-IDF index and publish it for get_ml_recommendations (run as Celery task)."""
+    # scikit-learn takes seconds to import, so only the index builder loads it
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    import joblib
+    import numpy as np
+    
+    # Build each product's text representation in the database, one row per product
+    tag_names = Product.tags.through.objects.filter(
+        product=OuterRef('pk')
+    ).order_by().values('product').annotate(
+        names=SpaceJoin('tag__name')
+    ).values('names')
+    rows = Product.objects.non_polymorphic().filter(
+        status=Product.ProductStatus.PUBLISHED
+    ).annotate(
+        corpus=Concat(
+            'name', Value(' '), 'description', Value(' '),
+            Coalesce(Subquery(tag_names), Value('')), Value(' '),
+            Coalesce('category__name', Value('')),
+            output_field=TextField()
+        )
+    ).order_by().values_list('id', 'corpus')
+    
+    product_ids = []
+    corpus = []
+    for product_id, text_features in rows:
+        product_ids.append(str(product_id))
+        corpus.append(text_features)
+    
+    if not corpus:
+        # Unpublish the stale index so recommendations fall back to trending
+        try:
+            os.remove(settings.RECOMMENDATION_INDEX_PATH)
+        except FileNotFoundError:
+            pass
+        return None
+    
+    # Rows come out L2-normalized, so ranking by dot product matches cosine similarity
+    vectorizer = TfidfVectorizer(
+        max_features=1000, stop_words='english', dtype=np.float32,
+        sublinear_tf=True, norm='l2', ngram_range=(1, 2), min_df=2
+    )
+    try:
+        feature_matrix = vectorizer.fit_transform(corpus)
+    except ValueError:
+        # Catalogue too small for any term to appear twice; keep every term
+        vectorizer.set_params(min_df=1)
+        feature_matrix = vectorizer.fit_transform(corpus)
+    id_to_row = {product_id: row for row, product_id in enumerate(product_ids)}
+    
+    # Write to a temporary file first so workers never load a half-written index
+    path = settings.RECOMMENDATION_INDEX_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # The fitted vectorizer stays out of the file so loading it never imports sklearn
+    joblib.dump((feature_matrix, product_ids, id_to_row), f'{path}.tmp')
+    # Replacing the file bumps its mtime, so every process reloads it on its next request
+    os.replace(f'{path}.tmp', path)
+    return tfidf_index_version()
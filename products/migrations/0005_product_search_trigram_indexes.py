@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+TRIGRAM_INDEXES = [
+    ('products_product_name_trgm', 'products_product', 'name'),
+    ('products_product_short_desc_trgm', 'products_product', 'short_description'),
+    ('products_product_desc_trgm', 'products_product', 'description'),
+    ('products_tag_name_trgm', 'products_tag', 'name'),
+    ('products_category_name_trgm', 'products_category', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm is PostgreSQL only; other backends keep the icontains search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_product_type_product_visibility'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def add_search_vector(apps, schema_editor):
+    # Generated tsvector column is PostgreSQL only; other backends use icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE products_product ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(short_description, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+        ") STORED"
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS products_product_search_tsv ON products_product USING gin (search_tsv)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS products_product_search_tsv')
+    schema_editor.execute('ALTER TABLE products_product DROP COLUMN IF EXISTS search_tsv')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
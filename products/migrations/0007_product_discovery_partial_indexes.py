@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_search_tsvector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_marketplace_promoted', True), ('status', 'published')), fields=['-discovery_rank', '-trending_score'], name='idx_promoted_rank'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at'], name='idx_new_arrivals'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('last_24h_revenue__gt', 0), ('status', 'published')), fields=['-last_24h_revenue'], name='idx_top_earners'),
+        ),
+    ]
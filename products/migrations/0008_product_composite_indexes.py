@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_discovery_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='products_pr_status_041708_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'visibility', '-trending_score'], name='prod_pub_trend_i'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'category', '-created_at'], name='prod_status_cat_created_i'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'is_featured', '-discovery_rank'], name='prod_featured_rank_i'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['storefront', 'status'], name='prod_storefront_status_i'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'published'), ('visibility', 'public')), fields=['-trending_score', '-created_at'], name='prod_published_trending'),
+        ),
+    ]
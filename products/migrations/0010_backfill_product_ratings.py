@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    # Ratings were never maintained before; the ProductReview signals keep
+    # them current from here on
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('products', 'ProductReview')
+
+    reviews = ProductReview.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.update(
+        rating_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+        rating_average=Coalesce(
+            Cast(
+                Subquery(reviews.annotate(average=Avg('rating')).values('average')),
+                DecimalField(max_digits=3, decimal_places=2)
+            ),
+            Value(Decimal('0.00'))
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_published_trending_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:02
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_backfill_product_ratings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='price_with_vat',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(then=models.F('price'), vat_inclusive=True), default=django.db.models.expressions.CombinedExpression(models.F('price'), '*', django.db.models.expressions.CombinedExpression(models.Value(1), '+', models.F('vat_rate')))), output_field=models.DecimalField(decimal_places=2, max_digits=10), verbose_name='price with VAT'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='vat_amount',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(then=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('price'), '*', models.F('vat_rate')), '/', django.db.models.expressions.CombinedExpression(models.Value(1), '+', models.F('vat_rate'))), vat_inclusive=True), default=django.db.models.expressions.CombinedExpression(models.F('price'), '*', models.F('vat_rate'))), output_field=models.DecimalField(decimal_places=2, max_digits=10), verbose_name='VAT amount'),
+        ),
+    ]
@@ -4,12 +4,16 @@ Includes digital downloads, memberships, communities, courses, and events.
 """
 
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from polymorphic.models import PolymorphicModel
+from polymorphic.managers import PolymorphicManager
+from polymorphic.query import PolymorphicQuerySet
 from decimal import Decimal
+from itertools import islice
 import uuid
 import json
 
@@ -65,6 +69,84 @@ class Tag(models.Model):
         return self.name
 
 
+class SelectRelatedPolymorphicQuerySet(PolymorphicQuerySet):
+    """Polymorphic queryset that reuses subclass rows already joined by select_related."""
+    
+    def _get_real_instances(self, base_result_objects):
+        selected = {}
+        remaining = []
+        for base_object in base_result_objects:
+            real_object = self._get_selected_real_instance(base_object)
+            if real_object is None:
+                remaining.append(base_object)
+            else:
+                selected[id(base_object)] = real_object
+        
+        if not selected:
+            return self._downcast(base_result_objects)
+        
+        # Rows whose subclass wasn't joined fall back to one query per type
+        fetched = {}
+        if remaining:
+            fetched = {obj.pk: obj for obj in self._downcast(remaining)}
+        
+        results = []
+        for base_object in base_result_objects:
+            real_object = selected.get(id(base_object)) or fetched.get(base_object.pk)
+            if real_object is not None:
+                results.append(real_object)
+        return results
+    
+    def _downcast(self, base_result_objects):
+        """Downcast with polymorphic's per-type queries, minus the subclass joins."""
+        queryset = self
+        if isinstance(self.query.select_related, dict):
+            # Polymorphic copies select_related onto each subclass query,
+            # where the reverse subclass links aren't valid
+            subclass_links = {
+                rel.get_accessor_name()
+                for rel in self.model._meta.related_objects
+                if getattr(rel, 'parent_link', False)
+            }
+            queryset = self._chain()
+            queryset.query.select_related = {
+                name: value
+                for name, value in self.query.select_related.items()
+                if name not in subclass_links
+            } or False
+        return super(SelectRelatedPolymorphicQuerySet, queryset)._get_real_instances(base_result_objects)
+    
+    def _get_selected_real_instance(self, base_object):
+        """Return the subclass instance select_related cached on base_object, if any."""
+        real_class = base_object.get_real_instance_class()
+        if real_class is None or real_class is type(base_object) or self.model not in real_class._meta.parents:
+            return None
+        
+        link = real_class._meta.get_ancestor_link(self.model)
+        real_object = base_object._state.fields_cache.get(link.remote_field.get_accessor_name())
+        if type(real_object) is not real_class:
+            return None
+        
+        # Carry annotations and other joined relations over from the base row
+        for name in (*self.query.annotation_select, *self.query.extra_select):
+            setattr(real_object, name, getattr(base_object, name))
+        for name, value in base_object._state.fields_cache.items():
+            real_object._state.fields_cache.setdefault(name, value)
+        return real_object
+
+
+class ProductQuerySet(SelectRelatedPolymorphicQuerySet):
+    """Custom queryset for products."""
+    
+    def with_subclasses(self):
+        """Join every product subclass so rows downcast without per-type queries."""
+        return self.select_related('digitaldownload', 'membership', 'community', 'course', 'event')
+    
+    def for_creator(self, user):
+        """Products owned by a creator, with category and creator joined."""
+        return self.select_related('category', 'creator').filter(creator=user)
+
+
 class Product(PolymorphicModel):
     """Base product model with polymorphic support for different product types."""
     
@@ -121,6 +203,27 @@ class Product(PolymorphicModel):
     # VAT and Tax
     vat_inclusive = models.BooleanField(_('VAT inclusive'), default=True)
     vat_rate = models.DecimalField(_('VAT rate'), max_digits=5, decimal_places=4, default=Decimal('0.15'))
+    # Computed by the database on write, so both are sortable and filterable in SQL.
+    # Unlike the old properties they only exist once the row is saved: reading
+    # them on an unsaved instance raises DoesNotExist
+    price_with_vat = models.GeneratedField(
+        expression=Case(
+            When(vat_inclusive=True, then=F('price')),
+            default=F('price') * (Value(1) + F('vat_rate'))
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name=_('price with VAT')
+    )
+    vat_amount = models.GeneratedField(
+        expression=Case(
+            When(vat_inclusive=True, then=F('price') * F('vat_rate') / (Value(1) + F('vat_rate'))),
+            default=F('price') * F('vat_rate')
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name=_('VAT amount')
+    )
     
     # Status and visibility
     status = models.CharField(_('status'), max_length=20, choices=ProductStatus.choices, default=ProductStatus.DRAFT)
@@ -158,6 +261,8 @@ class Product(PolymorphicModel):
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     published_at = models.DateTimeField(_('published at'), null=True, blank=True)
     
+    objects = PolymorphicManager.from_queryset(ProductQuerySet)()
+    
     class Meta:
         verbose_name = _('Product')
         verbose_name_plural = _('Products')
@@ -165,26 +270,45 @@ class Product(PolymorphicModel):
         indexes = [
             models.Index(fields=['creator', 'status']),
             models.Index(fields=['category']),
-            models.Index(fields=['status']),
             models.Index(fields=['is_featured']),
+            # Composite indexes for published listings; status leads, so
+            # they also serve plain status filters
+            models.Index(fields=['status', 'visibility', '-trending_score'], name='prod_pub_trend_i'),
+            models.Index(fields=['status', 'category', '-created_at'], name='prod_status_cat_created_i'),
+            models.Index(fields=['status', 'is_featured', '-discovery_rank'], name='prod_featured_rank_i'),
+            models.Index(fields=['storefront', 'status'], name='prod_storefront_status_i'),
+            # Partial indexes for the marketplace discovery sections
+            models.Index(
+                fields=['-discovery_rank', '-trending_score'],
+                condition=Q(is_marketplace_promoted=True, status='published'),
+                name='idx_promoted_rank'
+            ),
+            models.Index(
+                fields=['-trending_score', '-created_at'],
+                condition=Q(status='published', visibility='public'),
+                name='prod_published_trending'
+            ),
+            models.Index(
+                fields=['-published_at'],
+                condition=Q(status='published'),
+                name='idx_new_arrivals'
+            ),
+            models.Index(
+                fields=['-last_24h_revenue'],
+                condition=Q(status='published', last_24h_revenue__gt=0),
+                name='idx_top_earners'
+            ),
         ]
     
     def __str__(self):
         return self.name
     
-    @property
-    def price_with_vat(self):
-        """Calculate price including VAT if not already inclusive."""
-        if self.vat_inclusive:
-            return self.price
-        return self.price * (1 + self.vat_rate)
-    
-    @property
-    def vat_amount(self):
-        """Calculate VAT amount."""
-        if self.vat_inclusive:
-            return self.price * self.vat_rate / (1 + self.vat_rate)
-        return self.price * self.vat_rate
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # The database recomputed the generated VAT columns; drop the stale
+        # values so the next read loads them
+        for name in ('price_with_vat', 'vat_amount'):
+            self.__dict__.pop(name, None)
 
 
 class DigitalDownload(Product):
@@ -390,6 +514,12 @@ class ProductReview(models.Model):
 
 class ProductAnalytics(models.Model):
     """Product analytics and performance tracking."""
+    METRIC_FIELDS = [
+        'views', 'unique_views', 'purchases', 'revenue',
+        'organic_traffic', 'social_traffic', 'direct_traffic', 'referral_traffic',
+        'bounce_rate', 'time_on_page', 'conversion_rate',
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='analytics')
     
@@ -421,3 +551,17 @@ class ProductAnalytics(models.Model):
             models.Index(fields=['product', 'date']),
             models.Index(fields=['date']),
         ]
+    
+    @classmethod
+    def bulk_upsert(cls, rows, batch_size=10000, update_fields=None):
+        """Insert daily rows, overwriting the metrics of any (product, date) that already exists."""
+        # One INSERT ... ON CONFLICT DO UPDATE per batch instead of a save() per row
+        rows = iter(rows)
+        while batch := list(islice(rows, batch_size)):
+            cls.objects.bulk_create(
+                batch,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['product', 'date'],
+                update_fields=update_fields or cls.METRIC_FIELDS
+            )
@@ -0,0 +1,65 @@
+"""
+Product search helpers shared by the products API filters and marketplace views.
+Uses the pg_trgm and tsvector indexes on PostgreSQL and icontains elsewhere.
+"""
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+
+# Trigram matches on the pg_trgm GIN indexes (see migration 0005)
+TRIGRAM_SEARCH_WHERE = (
+    "products_product.name %% %s"
+    " OR products_product.short_description %% %s"
+    " OR products_product.description %% %s"
+    " OR products_product.category_id IN"
+    " (SELECT id FROM products_category WHERE name %% %s)"
+    " OR EXISTS (SELECT 1 FROM products_product_tags pt"
+    " JOIN products_tag t ON t.id = pt.tag_id"
+    " WHERE pt.product_id = products_product.id AND t.name %% %s)"
+)
+
+# Longer queries use the weighted search_tsv column (see migration 0006)
+FULL_TEXT_SEARCH_WHERE = "products_product.search_tsv @@ plainto_tsquery('simple', %s)"
+FULL_TEXT_SEARCH_RANK = "ts_rank(products_product.search_tsv, plainto_tsquery('simple', %s))"
+TRIGRAM_SEARCH_MAX_LENGTH = 3
+
+
+def search_products(queryset, value, fallback):
+    """Search products by relevance, or filter by the fallback Q on non-PostgreSQL backends."""
+    if connection.vendor == 'postgresql' and len(value) > TRIGRAM_SEARCH_MAX_LENGTH:
+        return queryset.extra(
+            where=[FULL_TEXT_SEARCH_WHERE], params=[value]
+        ).annotate(
+            search_rank=RawSQL(FULL_TEXT_SEARCH_RANK, (value,))
+        ).order_by('-search_rank')
+
+    if connection.vendor == 'postgresql':
+        return queryset.extra(
+            where=[TRIGRAM_SEARCH_WHERE], params=[value] * 5
+        ).annotate(
+            search_similarity=Greatest(
+                TrigramSimilarity('name', value),
+                TrigramSimilarity('short_description', value),
+                TrigramSimilarity('description', value),
+            )
+        ).order_by('-search_similarity')
+
+    return queryset.filter(fallback).distinct()
+
+
+def suggest_names(queryset, value, limit):
+    """Return up to limit names matching value, closest trigram matches first on PostgreSQL."""
+    if connection.vendor == 'postgresql':
+        table = queryset.model._meta.db_table
+        queryset = queryset.extra(
+            where=[f'{table}.name %% %s'], params=[value]
+        ).annotate(
+            similarity=TrigramSimilarity('name', value)
+        ).order_by('-similarity')
+    else:
+        queryset = queryset.filter(name__icontains=value)
+
+    return list(queryset.values_list('name', flat=True)[:limit])
@@ -120,13 +120,12 @@ class BaseProductSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'recommendation_score']
     
     def get_average_rating(self, obj):
-        reviews = obj.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
+        if obj.rating_count:
+            return round(float(obj.rating_average), 1)
         return None
     
     def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
+        return obj.rating_count
     
     def get_is_on_sale(self, obj):
         return obj.sale_price is not None and obj.sale_price < obj.price
@@ -309,13 +308,12 @@ class MarketplaceProductSerializer(serializers.ModelSerializer):
         return obj.__class__.__name__.lower()
     
     def get_average_rating(self, obj):
-        reviews = obj.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
+        if obj.rating_count:
+            return round(float(obj.rating_average), 1)
         return None
     
     def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
+        return obj.rating_count
     
     def get_is_trending(self, obj):
         return obj.trending_score > 0
@@ -497,9 +495,9 @@ class ProductListSerializer(serializers.ModelSerializer):
         return obj.__class__.__name__.lower()
     
     def get_average_rating(self, obj):
-        # Optimized for list view - could be pre-calculated
-        return 4.5  # Placeholder
+        if obj.rating_count:
+            return round(float(obj.rating_average), 1)
+        return None
     
     def get_review_count(self, obj):
-        # Optimized for list view - could be pre-calculated
-        return 10  # Placeholder
+        return obj.rating_count
@@ -0,0 +1,49 @@
+"""
+Signal handlers for the products app.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Category, Product, ProductReview
+
+ACTIVE_CATEGORY_CHOICES_CACHE_KEY = 'products:active_category_choices'
+CATEGORY_CHILDREN_CACHE_KEY = 'products:category_children'
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_active_category_choices(sender, instance, **kwargs):
+    """Drop the cached category choices and tree when a category changes."""
+    cache.delete_many([ACTIVE_CATEGORY_CHOICES_CACHE_KEY, CATEGORY_CHILDREN_CACHE_KEY])
+
+
+def refresh_product_rating(product_id):
+    """Recompute a product's rating_average and rating_count from its reviews in one UPDATE."""
+    reviews = ProductReview.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.filter(pk=product_id).update(
+        rating_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+        rating_average=Coalesce(
+            Cast(
+                Subquery(reviews.annotate(average=Avg('rating')).values('average')),
+                DecimalField(max_digits=3, decimal_places=2)
+            ),
+            Value(Decimal('0.00'))
+        )
+    )
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def update_product_rating(sender, instance, **kwargs):
+    """Keep the product's denormalized rating in step with its reviews."""
+    # Recomputed rather than adjusted by deltas, so rounding never drifts;
+    # deferred to commit so it sees the review change
+    product_id = instance.product_id
+    transaction.on_commit(lambda: refresh_product_rating(product_id))
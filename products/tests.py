@@ -1,3 +1,459 @@
-from django.test import TestCase
+import os
+import tempfile
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from digitera_platform.tasks import update_product_analytics
+
+from . import interactions, marketplace_views
+from .filters import ProductFilter
+from .interactions import buffer_product_view, flush_view_counts
+from .marketplace_views import (
+    build_tfidf_index, encode_cursor, get_ml_recommendations, get_tfidf_index, marketplace_api
+)
+from .models import Category, Course, DigitalDownload, Event, Product, ProductAnalytics
+
+User = get_user_model()
+
+
+class ProductTestMixin:
+    """Shared fixtures for product tests."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(email='creator@example.com', password='password')
+        cls.category = Category.objects.create(name='Design', slug='design')
+    
+    @classmethod
+    def create_product(cls, model=Product, **kwargs):
+        count = Product.objects.count()
+        kwargs.setdefault('name', f'Product {count}')
+        kwargs.setdefault('slug', f'product-{count}')
+        kwargs.setdefault('status', Product.ProductStatus.PUBLISHED)
+        kwargs.setdefault('category', cls.category)
+        return model.objects.create(creator=cls.creator, **kwargs)
+
+
+class SelectRelatedPolymorphicQuerySetTests(ProductTestMixin, TestCase):
+    """Downcasting products from select_related subclass joins."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.products = [
+            cls.create_product(DigitalDownload),
+            cls.create_product(Course),
+            cls.create_product(Event),
+            cls.create_product(),
+            cls.create_product(DigitalDownload),
+        ]
+    
+    def assert_real_instances(self, products):
+        expected = {product.pk: type(product) for product in self.products}
+        self.assertEqual({product.pk: type(product) for product in products}, expected)
+    
+    def test_with_subclasses_downcasts_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            products = list(Product.objects.with_subclasses().order_by('pk'))
+        
+        self.assertEqual(len(queries), 1)
+        self.assert_real_instances(products)
+    
+    def test_subclass_fields_are_loaded(self):
+        download = self.products[0]
+        DigitalDownload.objects.filter(pk=download.pk).update(file_size_mb=42)
+        
+        products = Product.objects.with_subclasses().in_bulk([download.pk])
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(products[download.pk].file_size_mb, 42)
+            self.assertEqual(products[download.pk].name, download.name)
+    
+    def test_annotations_and_joined_relations_carry_over(self):
+        products = list(
+            Product.objects.with_subclasses().select_related('category').annotate(
+                review_total=Count('reviews')
+            )
+        )
+        
+        self.assert_real_instances(products)
+        with self.assertNumQueries(0):
+            for product in products:
+                self.assertEqual(product.review_total, 0)
+                self.assertEqual(product.category.slug, 'design')
+    
+    def test_partial_join_falls_back_for_other_types(self):
+        products = list(Product.objects.select_related('course').order_by('pk'))
+        
+        self.assert_real_instances(products)
+    
+    def test_without_join_matches_polymorphic_results(self):
+        joined = list(Product.objects.with_subclasses().order_by('pk'))
+        plain = list(Product.objects.order_by('pk'))
+        
+        self.assertEqual(
+            [(type(product), product.pk) for product in joined],
+            [(type(product), product.pk) for product in plain]
+        )
+
+
+class ProductIdSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Product
+        fields = ['id']
+
+
+@mock.patch.object(marketplace_views, 'MarketplaceProductSerializer', ProductIdSerializer)
+class MarketplaceApiKeysetPaginationTests(ProductTestMixin, TestCase):
+    """Cursor pagination in marketplace_api."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        # Repeated values force the id tie-breaker to decide the order
+        for index, (price, rating, sales, trending) in enumerate([
+            ('10.00', '4.50', 3, 1.5),
+            ('10.00', '4.50', 3, 1.5),
+            ('5.00', '3.00', 0, 0.0),
+            ('20.00', '5.00', 7, 9.0),
+            ('10.00', '2.25', 3, 1.5),
+            ('0.00', '4.50', 1, 0.0),
+            ('20.00', '0.00', 7, 9.0),
+        ]):
+            cls.create_product(
+                price=Decimal(price), rating_average=Decimal(rating), last_24h_sales=sales,
+                trending_score=trending, published_at=now - timedelta(hours=index % 3)
+            )
+        cls.create_product(status=Product.ProductStatus.DRAFT)
+    
+    def get(self, **params):
+        request = APIRequestFactory().get('/api/marketplace/', params)
+        return marketplace_api(request)
+    
+    def collect_pages(self, sort_by, page_size=2):
+        ids, cursor = [], None
+        while True:
+            params = {'sort_by': sort_by, 'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            cursor = response.data['next_cursor']
+            self.assertEqual(response.data['has_next'], cursor is not None)
+            if cursor is None:
+                return ids
+    
+    def expected_ids(self, key, descending):
+        products = Product.objects.filter(status=Product.ProductStatus.PUBLISHED)
+        products = sorted(products, key=lambda product: (key(product), product.id), reverse=descending)
+        return [str(product.id) for product in products]
+    
+    def test_every_sort_pages_through_all_products_once(self):
+        keys = {
+            'price_low': lambda product: product.price,
+            'price_high': lambda product: product.price,
+            'newest': lambda product: product.published_at or product.created_at,
+            'rating': lambda product: product.rating_average,
+            'sales': lambda product: product.last_24h_sales,
+            'trending': lambda product: product.trending_score,
+        }
+        for sort_by, (_, descending) in marketplace_views.MARKETPLACE_SORTS.items():
+            with self.subTest(sort_by=sort_by):
+                self.assertEqual(
+                    self.collect_pages(sort_by), self.expected_ids(keys[sort_by], descending)
+                )
+    
+    def test_last_page_has_no_cursor(self):
+        response = self.get(page_size=10)
+        
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertFalse(response.data['has_next'])
+        self.assertIsNone(response.data['next_cursor'])
+    
+    def test_invalid_cursor_is_rejected(self):
+        cursors = [
+            'not base64!',
+            encode_cursor({'sort_value': 1}),
+            encode_cursor([None, str(self.creator.pk)]),
+            encode_cursor(['x', '00000000-0000-0000-0000-000000000000']),
+            encode_cursor(['1.5', 'not-a-uuid']),
+            encode_cursor(['1.5']),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.get(sort_by='trending', cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'error': 'Invalid cursor'})
+
+
+class ProductAnalyticsBulkUpsertTests(ProductTestMixin, TestCase):
+    """Batched (product, date) upserts of daily analytics."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.product = cls.create_product()
+        cls.start = date(2026, 1, 1)
+    
+    def rows(self, count, **metrics):
+        return [
+            ProductAnalytics(product=self.product, date=self.start + timedelta(days=day), **metrics)
+            for day in range(count)
+        ]
+    
+    def test_inserts_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            ProductAnalytics.bulk_upsert(self.rows(5, views=3), batch_size=2)
+        
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(ProductAnalytics.objects.filter(product=self.product, views=3).count(), 5)
+    
+    def test_accepts_a_generator(self):
+        ProductAnalytics.bulk_upsert(iter(self.rows(3)), batch_size=2)
+        
+        self.assertEqual(ProductAnalytics.objects.filter(product=self.product).count(), 3)
+    
+    def test_overwrites_existing_rows(self):
+        ProductAnalytics.bulk_upsert(self.rows(2, views=1, revenue=Decimal('10.00')))
+        ProductAnalytics.bulk_upsert(self.rows(3, views=5, revenue=Decimal('25.50')))
+        
+        analytics = ProductAnalytics.objects.filter(product=self.product)
+        self.assertEqual(analytics.count(), 3)
+        self.assertEqual(set(analytics.values_list('views', 'revenue')), {(5, Decimal('25.50'))})
+    
+    def test_update_fields_leaves_other_metrics_alone(self):
+        ProductAnalytics.bulk_upsert(self.rows(1, views=1, purchases=4))
+        ProductAnalytics.bulk_upsert(self.rows(1, views=9, purchases=0), update_fields=['views'])
+        
+        analytics = ProductAnalytics.objects.get(product=self.product)
+        self.assertEqual((analytics.views, analytics.purchases), (9, 4))
+    
+    def test_update_product_analytics_task(self):
+        today = timezone.now().date()
+        ProductAnalytics.objects.create(product=self.product, date=today, views=2, purchases=1)
+        
+        update_product_analytics(self.product.id, {'views': 7, 'unknown': 1})
+        
+        analytics = ProductAnalytics.objects.get(product=self.product, date=today)
+        self.assertEqual((analytics.views, analytics.purchases), (7, 1))
+
+
+class FakeRedis:
+    """The few Redis commands the view-count buffer uses, stored in memory."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+    
+    def getdel(self, key):
+        return self.data.pop(key, None)
+    
+    def sadd(self, key, member):
+        self.data.setdefault(key, set()).add(member.encode())
+    
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+    
+    def spop(self, key, count):
+        members = self.data.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+    
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((getattr(self.client, name), args))
+    
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class ViewCountBufferTests(ProductTestMixin, TestCase):
+    """Buffered product view counts and their periodic flush."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.product = cls.create_product(view_count=10)
+        cls.other = cls.create_product()
+    
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(interactions, 'get_redis_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def view_counts(self):
+        return dict(Product.objects.filter(
+            pk__in=[self.product.pk, self.other.pk]
+        ).values_list('pk', 'view_count'))
+    
+    def test_views_are_buffered_until_flushed(self):
+        for _ in range(3):
+            buffer_product_view(self.product.pk)
+        buffer_product_view(self.other.pk)
+        
+        self.assertEqual(self.view_counts(), {self.product.pk: 10, self.other.pk: 0})
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_view_counts(), 2)
+        
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(self.view_counts(), {self.product.pk: 13, self.other.pk: 1})
+    
+    def test_flush_hands_buffers_over(self):
+        buffer_product_view(self.product.pk)
+        flush_view_counts()
+        
+        self.assertEqual(flush_view_counts(), 0)
+        
+        buffer_product_view(self.product.pk)
+        self.assertEqual(flush_view_counts(), 1)
+        self.assertEqual(self.view_counts()[self.product.pk], 12)
+    
+    def test_flush_with_nothing_buffered(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_view_counts(), 0)
+    
+    def test_without_redis_views_are_written_directly(self):
+        with mock.patch.object(interactions, 'get_redis_client', return_value=None):
+            buffer_product_view(self.product.pk)
+            
+            self.assertEqual(self.view_counts()[self.product.pk], 11)
+            self.assertEqual(flush_view_counts(), 0)
+
+
+class CategoryTreeFilterTests(ProductTestMixin, TestCase):
+    """ProductFilter.category_tree over the cached category hierarchy."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.child = Category.objects.create(name='Logos', slug='logos', parent=cls.category)
+        cls.grandchild = Category.objects.create(name='Icons', slug='icons', parent=cls.child)
+        cls.sibling = Category.objects.create(name='Music', slug='music')
+        cls.products = {
+            category: cls.create_product(category=category)
+            for category in [cls.category, cls.child, cls.grandchild, cls.sibling]
+        }
+    
+    def setUp(self):
+        cache.clear()
+    
+    def filter(self, category_id):
+        products = ProductFilter({'category_tree': str(category_id)}, queryset=Product.objects.all()).qs
+        return set(products.values_list('pk', flat=True))
+    
+    def product_ids(self, *categories):
+        return {self.products[category].pk for category in categories}
+    
+    def test_includes_every_descendant(self):
+        self.assertEqual(
+            self.filter(self.category.pk), self.product_ids(self.category, self.child, self.grandchild)
+        )
+        self.assertEqual(self.filter(self.child.pk), self.product_ids(self.child, self.grandchild))
+        self.assertEqual(self.filter(self.sibling.pk), self.product_ids(self.sibling))
+    
+    def test_unknown_category_leaves_queryset_unfiltered(self):
+        self.assertEqual(self.filter(uuid.uuid4()), set(Product.objects.values_list('pk', flat=True)))
+    
+    def test_hierarchy_is_cached(self):
+        self.filter(self.category.pk)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.filter(self.category.pk)
+        
+        self.assertFalse([query for query in queries if 'FROM "products_category"' in query['sql']])
+    
+    def test_category_changes_invalidate_the_cache(self):
+        self.filter(self.category.pk)
+        
+        moved = Category.objects.create(name='Fonts', slug='fonts', parent=self.grandchild)
+        product = self.create_product(category=moved)
+        self.assertIn(product.pk, self.filter(self.category.pk))
+        
+        moved.parent = self.sibling
+        moved.save()
+        self.assertNotIn(product.pk, self.filter(self.category.pk))
+        self.assertIn(product.pk, self.filter(self.sibling.pk))
+
+
+class TfidfIndexTests(ProductTestMixin, TestCase):
+    """Publishing and loading the TF-IDF recommendation index."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.logo = cls.create_product(name='Logo design kit', description='Vector logo templates')
+        cls.logos = cls.create_product(name='Logo mockups', description='Logo design mockups')
+        cls.course = cls.create_product(name='Sourdough baking', description='Bread course', trending_score=5.0)
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'index.joblib')
+        settings_override = override_settings(RECOMMENDATION_INDEX_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Start every test like a fresh web process
+        for name, value in [('_tfidf_index', None), ('_tfidf_index_version', None)]:
+            patcher = mock.patch.object(marketplace_views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def recommend(self, *products):
+        return get_ml_recommendations(None, [{'product_id': product.pk} for product in products], limit=2)
+    
+    def test_without_index_falls_back_to_trending(self):
+        self.assertIsNone(get_tfidf_index())
+        self.assertEqual(list(self.recommend(self.logo))[0], self.course)
+    
+    def test_index_is_visible_without_the_cache(self):
+        build_tfidf_index()
+        cache.clear()
+        
+        self.assertIsNotNone(get_tfidf_index())
+        self.assertEqual(self.recommend(self.logo)[0], self.logos)
+    
+    def test_rebuild_is_reloaded(self):
+        build_tfidf_index()
+        _, product_ids, _ = get_tfidf_index()
+        os.utime(self.path, ns=(0, 0))
+        
+        product = self.create_product(name='Logo icons', description='Logo design icons')
+        build_tfidf_index()
+        
+        _, reloaded_ids, _ = get_tfidf_index()
+        self.assertNotIn(str(product.pk), product_ids)
+        self.assertIn(str(product.pk), reloaded_ids)
+    
+    def test_empty_catalogue_unpublishes_the_index(self):
+        build_tfidf_index()
+        Product.objects.update(status=Product.ProductStatus.DRAFT)
+        
+        self.assertIsNone(build_tfidf_index())
+        self.assertIsNone(get_tfidf_index())
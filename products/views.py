@@ -59,7 +59,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         products = Product.objects.filter(
             category=category,
             status='published'
-        )
+        ).with_subclasses()
         
         # Apply additional filters
         serializer = ProductListSerializer(products, many=True, context={'request': request})
@@ -130,7 +130,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         # Add select_related and prefetch_related for performance
-        queryset = queryset.select_related('creator', 'category').prefetch_related(
+        queryset = queryset.with_subclasses().select_related('creator', 'category').prefetch_related(
             'tags', 'files', 'reviews__reviewer'
         )
         